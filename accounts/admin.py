@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Professional, Facility
+from .models import User, Professional, Facility, Specialty, SpecialtyAlias
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -12,6 +12,23 @@ class ProfessionalAdmin(admin.ModelAdmin):
     list_display = ('user', 'license_number', 'is_verified', 'created_at')
     search_fields = ('user__email', 'license_number')
     list_filter = ('is_verified',)
+    exclude = ('specialty_set',)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.sync_specialty_set()
+
+class SpecialtyAliasInline(admin.TabularInline):
+    model = SpecialtyAlias
+    fields = ('name',)
+    extra = 1
+
+@admin.register(Specialty)
+class SpecialtyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name', 'aliases__name')
+    fields = ('name',)
+    inlines = [SpecialtyAliasInline]
 
 from django.contrib import admin
 from django.shortcuts import render, redirect
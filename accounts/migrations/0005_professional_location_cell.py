@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:42
+
+from django.db import migrations, models
+
+from core.utils import grid_cell
+
+
+def backfill_location_cells(apps, schema_editor):
+    Professional = apps.get_model("accounts", "Professional")
+    professionals = Professional.objects.filter(
+        current_location_lat__isnull=False,
+        current_location_lng__isnull=False,
+    ).only("id", "current_location_lat", "current_location_lng")
+
+    batch = []
+    for pro in professionals.iterator(chunk_size=2000):
+        pro.location_cell = grid_cell(pro.current_location_lat, pro.current_location_lng)
+        batch.append(pro)
+        if len(batch) >= 2000:
+            Professional.objects.bulk_update(batch, ["location_cell"])
+            batch = []
+    if batch:
+        Professional.objects.bulk_update(batch, ["location_cell"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_professional_avg_rating_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="professional",
+            name="location_cell",
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+        migrations.RunPython(backfill_location_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:45
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+# Same rules as Specialty.clean_name / normalize; profile entries are free text
+NAME_MAX_LENGTH = 100
+
+
+def _clean(name):
+    return " ".join(str(name).split())[:NAME_MAX_LENGTH].rstrip()
+
+
+def _normalize(name):
+    return _clean(name).lower()[:NAME_MAX_LENGTH]
+
+
+def backfill_specialties(apps, schema_editor):
+    Professional = apps.get_model("accounts", "Professional")
+    Specialty = apps.get_model("accounts", "Specialty")
+    Link = Professional.specialty_set.through
+
+    by_name = {}
+    links = []
+    for pro in Professional.objects.only("id", "specialties").iterator(chunk_size=2000):
+        seen = set()
+        for raw in pro.specialties or []:
+            normalized = _normalize(raw)
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            if normalized not in by_name:
+                by_name[normalized] = Specialty.objects.create(
+                    name=_clean(raw),
+                    normalized_name=normalized,
+                )
+            links.append(Link(professional_id=pro.id, specialty_id=by_name[normalized].id))
+
+    Link.objects.bulk_create(links, batch_size=2000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_professional_location_cell"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Specialty",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("normalized_name", models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                "verbose_name_plural": "specialties",
+            },
+        ),
+        migrations.AddField(
+            model_name="professional",
+            name="specialty_set",
+            field=models.ManyToManyField(blank=True, related_name="professionals", to="accounts.specialty"),
+        ),
+        migrations.CreateModel(
+            name="SpecialtyAlias",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("name", models.CharField(max_length=100)),
+                ("normalized_name", models.CharField(db_index=True, max_length=100)),
+                ("specialty", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="aliases", to="accounts.specialty")),
+            ],
+            options={
+                "verbose_name_plural": "specialty aliases",
+                "unique_together": {("specialty", "normalized_name")},
+            },
+        ),
+        migrations.RunPython(backfill_specialties, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:50
+
+from django.db import migrations, models
+
+
+def backfill_professional_scores(apps, schema_editor):
+    # Mirrors Professional.compute_professional_score at the time of writing
+    Professional = apps.get_model("accounts", "Professional")
+    batch = []
+    for pro in Professional.objects.filter(total_ratings__gte=3).iterator(chunk_size=2000):
+        total = pro.total_completed_shifts + pro.total_cancelled_shifts
+        completion_rate = pro.total_completed_shifts / total if total else 1.0
+        newbie_bonus = max(0, (20 - pro.total_ratings) / 20) * 5 * 0.15
+        pro.professional_score = round(
+            float(pro.avg_rating) * 0.50 + completion_rate * 5 * 0.35 + newbie_bonus, 2
+        )
+        batch.append(pro)
+        if len(batch) >= 2000:
+            Professional.objects.bulk_update(batch, ["professional_score"])
+            batch = []
+    if batch:
+        Professional.objects.bulk_update(batch, ["professional_score"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_specialty_professional_specialty_set_specialtyalias"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="professional",
+            name="professional_score",
+            field=models.FloatField(default=4.0),
+        ),
+        migrations.AddIndex(
+            model_name="professional",
+            index=models.Index(fields=["is_verified", "-professional_score"], name="pro_verified_score_idx"),
+        ),
+        migrations.RunPython(backfill_professional_scores, migrations.RunPython.noop),
+    ]
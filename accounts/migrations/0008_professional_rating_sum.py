@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:59
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_sums(apps, schema_editor):
+    Professional = apps.get_model("accounts", "Professional")
+    Review = apps.get_model("accounts", "Review")
+    rating_sums = (
+        Review.objects.filter(target_user=OuterRef("user_id"))
+        .order_by().values("target_user")
+        .annotate(total=Sum("rating")).values("total")
+    )
+    Professional.objects.update(rating_sum=Coalesce(Subquery(rating_sums), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0007_professional_professional_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="professional",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_sums, migrations.RunPython.noop),
+    ]
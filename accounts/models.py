@@ -1,9 +1,10 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils.translation import gettext_lazy as _
 from .managers import CustomUserManager
 from core.models import BaseModel
+from core.utils import grid_cell
 import uuid
 
 class User(AbstractUser):
@@ -29,28 +30,103 @@ class User(AbstractUser):
         return hasattr(self, 'facility')
 
 
+class Specialty(BaseModel):
+    """Canonical specialty (e.g. "ICU Nurse") that professionals are linked to."""
+    NAME_MAX_LENGTH = 100
+
+    name = models.CharField(max_length=NAME_MAX_LENGTH, unique=True)
+    normalized_name = models.CharField(max_length=NAME_MAX_LENGTH, unique=True)
+
+    class Meta:
+        verbose_name_plural = 'specialties'
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.name = self.clean_name(self.name)
+        self.normalized_name = self.normalize(self.name)[:self.NAME_MAX_LENGTH]
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def normalize(name):
+        """Lowercase and collapse whitespace so "ICU  nurse" == "ICU Nurse"."""
+        return ' '.join(str(name).split()).lower()
+
+    @classmethod
+    def clean_name(cls, name):
+        """Collapse whitespace and cut free-form profile entries down to the column size."""
+        return ' '.join(str(name).split())[:cls.NAME_MAX_LENGTH].rstrip()
+
+    @classmethod
+    def get_or_create_by_name(cls, name):
+        name = cls.clean_name(name)
+        normalized_name = cls.normalize(name)[:cls.NAME_MAX_LENGTH]
+        try:
+            # Savepoint, so a concurrent insert of the same name does not break the caller's transaction
+            with transaction.atomic():
+                specialty, _ = cls.objects.get_or_create(
+                    normalized_name=normalized_name, defaults={'name': name},
+                )
+        except IntegrityError:
+            specialty = cls.objects.get(normalized_name=normalized_name)
+        return specialty
+
+
+class SpecialtyAlias(BaseModel):
+    """Alternative name for a specialty, e.g. "Intensive Care" for "ICU Nurse"."""
+    specialty = models.ForeignKey(Specialty, on_delete=models.CASCADE, related_name='aliases')
+    name = models.CharField(max_length=Specialty.NAME_MAX_LENGTH)
+    normalized_name = models.CharField(max_length=Specialty.NAME_MAX_LENGTH, db_index=True)
+
+    class Meta:
+        unique_together = ('specialty', 'normalized_name')
+        verbose_name_plural = 'specialty aliases'
+
+    def __str__(self):
+        return f"{self.name} → {self.specialty.name}"
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = Specialty.normalize(self.name)
+        super().save(*args, **kwargs)
+
+
 class Professional(BaseModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='professional')
     license_number = models.CharField(max_length=50, unique=True)
     license_expiry_date = models.DateField(null=True, blank=True)
     specialties = models.JSONField(default=list)  # e.g. ["ICU", "Pediatrics"]
+    # Normalized mirror of `specialties`, used for matching in SQL
+    specialty_set = models.ManyToManyField(Specialty, blank=True, related_name='professionals')
     cv_url = models.URLField(null=True, blank=True)
     certificate_url = models.URLField(null=True, blank=True)
     is_verified = models.BooleanField(default=False)
     rejection_reason = models.TextField(null=True, blank=True)
     current_location_lat = models.FloatField(null=True, blank=True)
     current_location_lng = models.FloatField(null=True, blank=True)
+    # Grid cell of the current location (see core.utils.grid_cell), used to
+    # prefilter nearby professionals without scanning the whole table. Set by save().
+    location_cell = models.CharField(max_length=20, null=True, blank=True, db_index=True)
     
     # Phase 2: Wallet & Multi-Currency
     wallet_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     country = models.CharField(max_length=100, default='Nigeria')
     currency = models.CharField(max_length=10, default='NGN')
 
-    # Cached rating & reliability stats (updated by RatingService)
+    # Cached rating & reliability stats, maintained incrementally by
+    # shifts.rating_service.record_professional_stats
     avg_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    rating_sum = models.PositiveIntegerField(default=0)  # Running total behind avg_rating
     total_ratings = models.PositiveIntegerField(default=0)
     total_completed_shifts = models.PositiveIntegerField(default=0)
     total_cancelled_shifts = models.PositiveIntegerField(default=0)
+    # Materialized compute_professional_score(), updated with the stats above
+    professional_score = models.FloatField(default=4.0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_verified', '-professional_score'], name='pro_verified_score_idx'),
+        ]
 
     @property
     def completion_rate(self):
@@ -59,10 +135,10 @@ class Professional(BaseModel):
             return 1.0  # New professionals get benefit of the doubt
         return self.total_completed_shifts / total
 
-    @property
-    def professional_score(self):
+    def compute_professional_score(self):
         """
         Composite score (0–5) used for shift notification priority & ranking.
+        Stored in `professional_score` by shifts.rating_service.
 
         Formula:
           score = (avg_rating × 0.50)          — quality of work
@@ -82,6 +158,19 @@ class Professional(BaseModel):
 
         return round(rating_component + reliability_component + newbie_bonus, 2)
 
+    def sync_specialty_set(self):
+        """Link this professional to the Specialty rows for their `specialties` list."""
+        names = [n for n in (self.specialties or []) if Specialty.normalize(n)]
+        self.specialty_set.set([Specialty.get_or_create_by_name(n) for n in names])
+
+    def save(self, *args, **kwargs):
+        # Keep the grid cell in step with the coordinates on every write path
+        self.location_cell = grid_cell(self.current_location_lat, self.current_location_lng)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'current_location_lat', 'current_location_lng'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'location_cell'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Professional: {self.user.email}"
 
@@ -1,5 +1,6 @@
+from django.db.models import CharField, Count, F, Max, Q, Value
 from core.services import BaseSelector
-from .models import User
+from .models import User, Professional, Specialty, SpecialtyAlias
 
 class UserSelector(BaseSelector):
     def get_user_by_email(self, email):
@@ -33,3 +34,61 @@ class UserSelector(BaseSelector):
                 "wallet_balance": str(user.facility.wallet_balance),
             }
         return data
+
+
+class SpecialtySelector(BaseSelector):
+    def matching(self, term):
+        """
+        Specialties that match a free-text term such as a shift's specialty.
+
+        A specialty matches if its name contains the term or is contained in
+        it (so "ICU" matches "ICU Nurse"), or if one of its aliases equals the
+        term exactly. Everything runs in SQL against the specialty tables.
+        """
+        normalized = Specialty.normalize(term or '')
+        if not normalized:
+            return Specialty.objects.none()
+
+        alias_matches = SpecialtyAlias.objects.filter(
+            normalized_name=normalized,
+        ).values('specialty_id')
+
+        return Specialty.objects.alias(
+            term=Value(normalized, output_field=CharField()),
+        ).filter(
+            Q(normalized_name__contains=normalized)
+            | Q(term__contains=F('normalized_name'))
+            | Q(id__in=alias_matches)
+        )
+
+    def version(self):
+        """
+        Cheap stamp of the specialty and alias tables, for ETags of responses
+        filtered by specialty: one aggregate over both. Any insert, delete or
+        save changes it.
+        """
+        return tuple(
+            Specialty.objects.aggregate(
+                specialty_count=Count('id', distinct=True), specialty_updated=Max('updated_at'),
+                alias_count=Count('aliases'), alias_updated=Max('aliases__updated_at'),
+            ).values()
+        )
+
+    def matching_names(self, term):
+        """Normalized names and aliases of every specialty matching the term."""
+        specialties = self.matching(term)
+        names = set(specialties.values_list('normalized_name', flat=True))
+        names.update(
+            SpecialtyAlias.objects.filter(specialty__in=specialties)
+            .values_list('normalized_name', flat=True)
+        )
+        normalized = Specialty.normalize(term or '')
+        if normalized:
+            names.add(normalized)
+        return names
+
+    def professional_ids(self, term):
+        """Subquery of IDs of professionals linked to a specialty matching the term."""
+        return Professional.specialty_set.through.objects.filter(
+            specialty__in=self.matching(term),
+        ).values('professional_id')
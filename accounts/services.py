@@ -1,3 +1,5 @@
+import math
+
 from django.contrib.auth import authenticate
 from rest_framework.authtoken.models import Token
 from django.db import transaction
@@ -77,6 +79,16 @@ class AdminVerifyProfessionalService(BaseService):
         
         return professional
 
+def _coordinate(value, name, limit):
+    # Form and multipart bodies deliver coordinates as strings
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number.")
+    if not math.isfinite(number) or abs(number) > limit:
+        raise ValueError(f"{name} must be between -{limit} and {limit}.")
+    return number
+
 class ProfessionalUpdateService(BaseService):
     def __call__(self, user, specialties=None, location_lat=None, location_lng=None, cv_url=None, certificate_url=None):
         if not user.is_professional:
@@ -87,9 +99,9 @@ class ProfessionalUpdateService(BaseService):
         if specialties is not None:
             professional.specialties = specialties
         if location_lat is not None:
-            professional.current_location_lat = location_lat
+            professional.current_location_lat = _coordinate(location_lat, "location_lat", 90)
         if location_lng is not None:
-            professional.current_location_lng = location_lng
+            professional.current_location_lng = _coordinate(location_lng, "location_lng", 180)
         if cv_url is not None:
             professional.cv_url = cv_url
             
@@ -100,7 +112,8 @@ class ProfessionalUpdateService(BaseService):
             verify_professional_certificate.delay(professional.id)
             
         professional.save()
-        professional.save()
+        if specialties is not None:
+            professional.sync_specialty_set()
         return professional
 
 from .models import FacilityStaff
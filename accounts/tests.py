@@ -1,3 +1,82 @@
+from unittest import mock
+
+from django.db import IntegrityError
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.utils import grid_cell
+from .models import Professional, Specialty, User
+
+
+class ProfessionalProfileUpdateTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(email='profile-pro@example.com', password='x')
+        self.professional = Professional.objects.create(user=user, license_number='LIC-PROFILE')
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+    def test_form_encoded_coordinates(self):
+        response = self.client.put(
+            '/api/v1/auth/profile/', {'location_lat': '6.45', 'location_lng': '3.39'}, format='multipart',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.professional.refresh_from_db()
+        self.assertEqual(self.professional.current_location_lat, 6.45)
+        self.assertEqual(self.professional.location_cell, grid_cell(6.45, 3.39))
+
+    def test_bad_coordinates_are_rejected(self):
+        for lat in ('north', 'nan', '91'):
+            response = self.client.put(
+                '/api/v1/auth/profile/', {'location_lat': lat, 'location_lng': '3.39'}, format='multipart',
+            )
+            self.assertEqual(response.status_code, 400, msg=lat)
+        self.professional.refresh_from_db()
+        self.assertIsNone(self.professional.current_location_lat)
+
+
+class ProfessionalLocationCellTests(TestCase):
+
+    def test_every_save_recomputes_the_cell(self):
+        user = User.objects.create_user(email='cell-pro@example.com', password='x')
+        pro = Professional.objects.create(
+            user=user, license_number='LIC-CELL', current_location_lat=6.45, current_location_lng=3.39,
+        )
+        self.assertEqual(pro.location_cell, grid_cell(6.45, 3.39))
+
+        # As the admin does: plain save() after editing the coordinates
+        pro.current_location_lat, pro.current_location_lng = 9.06, 7.49
+        pro.save()
+        self.assertEqual(Professional.objects.get(id=pro.id).location_cell, grid_cell(9.06, 7.49))
+
+        pro.current_location_lat = 4.8
+        pro.save(update_fields=['current_location_lat'])
+        self.assertEqual(Professional.objects.get(id=pro.id).location_cell, grid_cell(4.8, 7.49))
+
+
+class SpecialtySyncTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user(email='specialty-pro@example.com', password='x')
+        self.professional = Professional.objects.create(user=user, license_number='LIC-SPEC')
+
+    def test_long_free_text_entries_are_cut_to_the_column(self):
+        long_entry = 'Paediatric intensive care ' * 8
+        self.professional.specialties = [long_entry, long_entry.upper(), 'ICU']
+        self.professional.sync_specialty_set()
+
+        names = sorted(self.professional.specialty_set.values_list('name', flat=True), key=len)
+        self.assertEqual(len(names), 2)
+        self.assertEqual(names[0], 'ICU')
+        self.assertLessEqual(len(names[1]), Specialty.NAME_MAX_LENGTH)
+        self.assertTrue(long_entry.startswith(names[1]))
+
+    def test_concurrent_create_falls_back_to_the_winner(self):
+        # Another request committed the same specialty between our SELECT and INSERT
+        Specialty.objects.create(name='Theatre Nurse')
+        duplicate = IntegrityError('duplicate key value violates unique constraint')
 
-# Create your tests here.
+        with mock.patch.object(Specialty.objects, 'get_or_create', side_effect=duplicate):
+            specialty = Specialty.get_or_create_by_name('theatre  nurse')
+        self.assertEqual(specialty.name, 'Theatre Nurse')
+        self.assertEqual(Specialty.get_or_create_by_name('THEATRE NURSE'), specialty)
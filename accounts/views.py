@@ -197,6 +197,8 @@ class ProfileView(APIView):
             if address is not None:
                 facility.address = address
             facility.save()
+            from shifts.feed_cache import invalidate_facility
+            invalidate_facility(facility)
             return Response({"status": "updated"})
 
         return Response({"status": "updated"})
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Transaction, Invoice
+from .models import Transaction, Invoice, DuePayout
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -12,3 +12,9 @@ class InvoiceAdmin(admin.ModelAdmin):
     list_display = ('facility', 'month', 'amount', 'status', 'created_at')
     search_fields = ('facility__name',)
     list_filter = ('status', 'month')
+
+@admin.register(DuePayout)
+class DuePayoutAdmin(admin.ModelAdmin):
+    list_display = ('application', 'status', 'due_at', 'amount', 'paid_at')
+    list_filter = ('status',)
+    raw_id_fields = ('application',)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0003_alter_transaction_transaction_type_embedlywallet"),
+        ("shifts", "0007_shiftexpiry"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(fields=["user", "-created_at"], name="txn_user_created_idx"),
+        ),
+    ]
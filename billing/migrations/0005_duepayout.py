@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:00
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0004_hot_query_indexes"),
+        ("shifts", "0009_shiftapplication_time_range"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DuePayout",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("due_at", models.DateTimeField()),
+                ("status", models.CharField(choices=[("PENDING", "Pending"), ("PAID", "Paid"), ("SKIPPED", "Skipped")], default="PENDING", max_length=20)),
+                ("amount", models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ("paid_at", models.DateTimeField(blank=True, null=True)),
+                ("application", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="due_payouts", to="shifts.shiftapplication")),
+            ],
+            options={
+                "indexes": [models.Index(condition=models.Q(("status", "PENDING")), fields=["due_at"], name="duepayout_pending_due_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0005_duepayout"),
+        ("shifts", "0009_shiftapplication_time_range"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="duepayout",
+            name="kind",
+            field=models.CharField(choices=[("SHIFT_PAY", "Shift Pay"), ("COMPENSATION", "Cancellation Compensation")], default="SHIFT_PAY", max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name="duepayout",
+            constraint=models.UniqueConstraint(fields=("application", "kind"), name="unique_payout_per_application_kind"),
+        ),
+    ]
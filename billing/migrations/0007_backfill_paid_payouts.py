@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:40
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_paid_payouts(apps, schema_editor):
+    # Payouts made before the DuePayout ledger existed only left a PAYOUT
+    # Transaction behind. Record them as PAID so a legacy payout_professional
+    # task or an early release cannot credit the same application again.
+    # Cancelled applications were paid compensation; everything else shift pay.
+    ShiftApplication = apps.get_model("shifts", "ShiftApplication")
+    Transaction = apps.get_model("billing", "Transaction")
+    DuePayout = apps.get_model("billing", "DuePayout")
+
+    payouts = Transaction.objects.filter(
+        transaction_type="PAYOUT", status="SUCCESS",
+        shift_id=OuterRef("shift_id"), user_id=OuterRef("professional__user_id"),
+    ).order_by("created_at")
+    applications = (
+        ShiftApplication.objects
+        .annotate(
+            paid_amount=Subquery(payouts.values("amount")[:1]),
+            paid_at=Subquery(payouts.values("created_at")[:1]),
+        )
+        .filter(paid_amount__isnull=False)
+        .values_list("id", "status", "paid_amount", "paid_at")
+    )
+
+    batch = []
+    for application_id, status, amount, paid_at in applications.iterator(chunk_size=2000):
+        batch.append(DuePayout(
+            application_id=application_id,
+            kind="COMPENSATION" if status == "CANCELLED" else "SHIFT_PAY",
+            status="PAID", amount=amount, due_at=paid_at, paid_at=paid_at,
+        ))
+        if len(batch) >= 2000:
+            DuePayout.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        DuePayout.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("billing", "0006_duepayout_kind"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_paid_payouts, migrations.RunPython.noop),
+    ]
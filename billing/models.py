@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from accounts.models import Facility, Professional, User
-from shifts.models import Shift
+from shifts.models import Shift, ShiftApplication
 from core.models import BaseModel
 
 
@@ -37,10 +38,98 @@ class Transaction(BaseModel):
     status = models.CharField(max_length=20, default='PENDING') # PENDING, SUCCESS, FAILED
     # created_at in BaseModel
     shift = models.ForeignKey(Shift, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Transaction history, newest first (TransactionListView)
+            models.Index(fields=['user', '-created_at'], name='txn_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} - {self.status}"
 
+class DuePayout(BaseModel):
+    """
+    Payout ledger: at most one entry per application and kind. Scheduled
+    SHIFT_PAY entries are credited by billing.tasks.process_due_payouts once
+    due_at has passed; immediate payouts are recorded already PAID.
+    """
+    KIND_CHOICES = (
+        ('SHIFT_PAY', 'Shift Pay'),
+        ('COMPENSATION', 'Cancellation Compensation'),
+    )
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('PAID', 'Paid'),
+        ('SKIPPED', 'Skipped'),  # Application was no longer eligible when due
+    )
+
+    application = models.ForeignKey(ShiftApplication, on_delete=models.CASCADE, related_name='due_payouts')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='SHIFT_PAY')
+    due_at = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)  # Set when paid
+    paid_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['due_at'], name='duepayout_pending_due_idx',
+                condition=models.Q(status='PENDING'),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['application', 'kind'], name='unique_payout_per_application_kind'),
+        ]
+
+    @property
+    def reference(self):
+        """Transaction reference for this payout; unique, so it can only be logged once."""
+        return f"PAYOUT-{self.id}"
+
+    @classmethod
+    def schedule(cls, application, delay, kind='SHIFT_PAY'):
+        """
+        Queue the application's payout to fall due after `delay` (a timedelta).
+        Re-scheduling only ever brings a pending payout forward. A skipped
+        payout (the application was not eligible when it fell due) is queued
+        again; a paid one is left alone.
+        """
+        due_at = timezone.now() + delay
+        payout, created = cls.objects.get_or_create(
+            application=application, kind=kind, defaults={'due_at': due_at},
+        )
+        if created:
+            return payout
+        if payout.status == 'SKIPPED':
+            payout.status = 'PENDING'
+            payout.due_at = due_at
+            payout.save(update_fields=['status', 'due_at', 'updated_at'])
+        elif payout.status == 'PENDING' and payout.due_at > due_at:
+            payout.due_at = due_at
+            payout.save(update_fields=['due_at', 'updated_at'])
+        return payout
+
+    @classmethod
+    def record_paid(cls, application, kind, amount):
+        """
+        Insert a PAID entry for a payout made right now. Returns the entry, or
+        None if this application already has a payout of this kind, in which
+        case the caller must not credit the wallet again.
+        """
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                return cls.objects.create(
+                    application=application, kind=kind, status='PAID',
+                    amount=amount, due_at=now, paid_at=now,
+                )
+        except IntegrityError:
+            return None
+
+    def __str__(self):
+        return f"{self.kind} {self.status} for {self.application_id} due {self.due_at}"
+
 class Invoice(BaseModel):
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE, related_name='invoices')
     month = models.DateField() # First day of the month
@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Transaction
 from shifts.models import ShiftApplication
@@ -74,11 +75,9 @@ class TransactionSerializer(serializers.ModelSerializer):
     def get_professional(self, obj):
         if not obj.shift or obj.transaction_type != 'PAYOUT':
             return None
-        app = (
-            ShiftApplication.objects
-            .filter(shift=obj.shift, professional__user=obj.user)
-            .select_related('professional__user')
-            .first()
+        app = next(
+            (a for a in _shift_applications(obj.shift) if a.professional.user_id == obj.user_id),
+            None,
         )
         if not app:
             return None
@@ -95,21 +94,31 @@ class TransactionSerializer(serializers.ModelSerializer):
             or not request.user.is_facility
         ):
             return None
-        apps = (
-            ShiftApplication.objects
-            .filter(
-                shift=obj.shift,
-                status__in=['CONFIRMED', 'IN_PROGRESS', 'COMPLETED'],
-            )
-            .select_related('professional__user')
-        )
         result = [
             {**_serialize_professional(a.professional), 'status': a.status}
-            for a in apps
+            for a in _shift_applications(obj.shift)
+            if a.status in ('CONFIRMED', 'IN_PROGRESS', 'COMPLETED')
         ]
         return result or None
 
 
+def with_shift_applications(transactions):
+    """Prefetch what TransactionSerializer needs so it runs a fixed number of queries."""
+    return transactions.select_related('shift__facility').prefetch_related(Prefetch(
+        'shift__applications',
+        queryset=ShiftApplication.objects.select_related('professional__user').order_by('created_at'),
+        to_attr='prefetched_applications',
+    ))
+
+
+def _shift_applications(shift):
+    # Prefetched by with_shift_applications; falls back to a query otherwise
+    apps = getattr(shift, 'prefetched_applications', None)
+    if apps is None:
+        apps = list(shift.applications.select_related('professional__user').order_by('created_at'))
+    return apps
+
+
 def _serialize_professional(professional):
     name = f"{professional.user.first_name} {professional.user.last_name}".strip()
     return {
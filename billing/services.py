@@ -1,6 +1,9 @@
+from datetime import timedelta
 from django.db import transaction
 from core.services import BaseService
-from .models import Transaction
+from shifts.models import ShiftApplication
+from .models import DuePayout, Transaction
+from .tasks import PAYABLE_STATUSES, process_due_payouts
 from accounts.models import User
 import uuid
 
@@ -37,18 +40,19 @@ class ReleaseFundsService(BaseService):
         if not user.is_facility:
             raise PermissionError("Only facilities can release funds.")
             
-        # Logic to find the pending payout task and execute it immediately?
-        # Or just trigger the payout logic now and cancel the scheduled task?
-        # Celery task revocation is tricky without task_id.
-        # Alternative: The task checks a flag. Or we just run the logic here and set a flag "paid" on application.
-        
-        # Let's assume we run the logic here.
-        # We need to import payout_professional logic or move it to a service.
-        # Ideally, payout_professional task calls a service `ProcessPayoutService`.
-        # Then we can call `ProcessPayoutService` here too.
-        
-        from .tasks import payout_professional
-        # We can just call the task synchronously or with delay=0
-        payout_professional.apply_async((application_id,), countdown=0)
-        
+        # Make the queued payout due now; the batch sweep credits it
+        try:
+            application = ShiftApplication.objects.get(
+                id=application_id, shift__facility=user.facility,
+            )
+        except ShiftApplication.DoesNotExist:
+            raise ValueError("Application not found.")
+
+        # Same eligibility the sweep checks; anything else would be skipped
+        if application.status not in PAYABLE_STATUSES or not application.clock_out_time:
+            raise ValueError("Funds can only be released once the professional has clocked out.")
+
+        DuePayout.schedule(application, delay=timedelta(0))
+        transaction.on_commit(lambda: process_due_payouts.delay())
+
         return {"status": "success", "message": "Funds released."}
@@ -1,44 +1,92 @@
+from collections import defaultdict
+from datetime import timedelta
+
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from accounts.models import Professional
 from shifts.models import ShiftApplication
-from .models import Transaction
-import uuid
+from .models import DuePayout, Transaction
 from decimal import Decimal
 
+PAYABLE_STATUSES = ('CONFIRMED', 'COMPLETED', 'IN_PROGRESS')
+
+
 @shared_task
 def payout_professional(application_id):
+    """
+    Kept for payout tasks queued before DuePayout existed: makes the
+    application's payout due now so the next batch sweep credits it.
+    """
     try:
         application = ShiftApplication.objects.get(id=application_id)
     except ShiftApplication.DoesNotExist:
         return
 
-    if application.status not in ('CONFIRMED', 'COMPLETED', 'IN_PROGRESS') or not application.clock_out_time:
-        return  # Not eligible
-
-    professional = application.professional
-    shift = application.shift
-    
-    # Calculate Amount: Hourly Rate * Duration
-    duration = (shift.end_time - shift.start_time).total_seconds() / 3600
-    amount = shift.rate * Decimal(duration)
-    
-    # 1. Call Paystack API (Mocked) - Transfer to Bank?
-    # User said: "Professional can make withdrawal".
-    # So here we just credit their wallet. Withdrawal is a separate action.
-    
-    with transaction.atomic():
-        # Credit Professional Wallet
-        professional.wallet_balance += amount
-        professional.save()
-        
-        # Create Transaction Record (Credit)
-        Transaction.objects.create(
-            user=professional.user,
-            amount=amount,
-            transaction_type='PAYOUT', # Or 'EARNING'
-            reference=str(uuid.uuid4()),
-            status='SUCCESS',
-            shift=shift
-        )
-    
-    print(f"Credited {amount} to {professional.user.email} wallet.")
+    DuePayout.schedule(application, delay=timedelta(0))
+
+
+@shared_task
+def process_due_payouts():
+    """
+    Runs every minute. Credits every payout that has fallen due, a batch at a
+    time: one F() wallet update per professional and bulk-created PAYOUT
+    transactions per batch. Rows locked by a concurrent sweep are skipped.
+    """
+    batch_size = settings.MAINTENANCE_CHUNK_SIZE
+    paid = skipped = 0
+
+    while True:
+        with transaction.atomic():
+            now = timezone.now()
+            batch = list(
+                DuePayout.objects
+                .select_for_update(skip_locked=True, of=('self',))
+                .filter(status='PENDING', due_at__lte=now)
+                .select_related('application__shift', 'application__professional')
+                .order_by('due_at')[:batch_size]
+            )
+            if not batch:
+                break
+
+            credits = defaultdict(Decimal)
+            transactions = []
+            for payout in batch:
+                application = payout.application
+                if application.status not in PAYABLE_STATUSES or not application.clock_out_time:
+                    payout.status = 'SKIPPED'  # Not eligible
+                    skipped += 1
+                    continue
+
+                # Calculate Amount: Hourly Rate * Duration
+                shift = application.shift
+                duration = (shift.end_time - shift.start_time).total_seconds() / 3600
+                amount = (shift.rate * Decimal(str(duration))).quantize(Decimal('0.01'))
+
+                credits[application.professional_id] += amount
+                transactions.append(Transaction(
+                    user_id=application.professional.user_id,
+                    amount=amount,
+                    transaction_type='PAYOUT',
+                    reference=payout.reference,
+                    status='SUCCESS',
+                    shift=shift,
+                ))
+                payout.status = 'PAID'
+                payout.amount = amount
+                payout.paid_at = now
+                paid += 1
+
+            # Credit Professional Wallets
+            for professional_id, amount in credits.items():
+                Professional.objects.filter(id=professional_id).update(
+                    wallet_balance=F('wallet_balance') + amount,
+                )
+            Transaction.objects.bulk_create(transactions)
+            for payout in batch:
+                payout.updated_at = now
+            DuePayout.objects.bulk_update(batch, ['status', 'amount', 'paid_at', 'updated_at'])
+
+    return f"Paid {paid} payouts, skipped {skipped}."
@@ -1,3 +1,215 @@
+import importlib
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Facility, Professional, User
+from core.testing import QueryBudgetMixin
+from shifts.models import Shift, ShiftApplication
+from shifts.services import ClockOutService
+from .models import DuePayout, Invoice, Transaction
+from .services import ReleaseFundsService
+from .tasks import payout_professional, process_due_payouts
+
+
+class ListQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Billing list endpoints run the same number of queries however many rows they return."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email='billing-facility@example.com', password='x')
+        cls.facility = Facility.objects.create(
+            user=user, name='Billing Hospital', address='Lagos', rc_number='RC-BILLING',
+            is_verified=True, wallet_balance=Decimal('1000000'),
+        )
+
+    def setUp(self):
+        self.seeded = 0
+
+    def seed_transactions(self, n):
+        for _ in range(n):
+            self.seeded += 1
+            start = timezone.now() + timedelta(days=1, hours=10 * self.seeded)
+            shift = Shift.objects.create(
+                facility=self.facility, role='Nurse', specialty='ICU', quantity_needed=2,
+                start_time=start, end_time=start + timedelta(hours=8), rate=Decimal('3000'),
+            )
+            for i in range(2):
+                user = User.objects.create_user(email=f'billing-p{self.seeded}-{i}@example.com', password='x')
+                pro = Professional.objects.create(user=user, license_number=f'LIC-BILL-{self.seeded}-{i}')
+                ShiftApplication.objects.create(shift=shift, professional=pro, status='CONFIRMED')
+            Transaction.objects.create(
+                user=self.facility.user, amount=Decimal('6000'), transaction_type='CHARGE',
+                reference=f'budget-{self.seeded}', status='SUCCESS', shift=shift,
+            )
+
+    def test_transactions(self):
+        client = self.api_client(self.facility.user)
+        self.assertConstantQueries(client, '/api/v1/billing/transactions/', self.seed_transactions)
+
+    def test_professional_payouts(self):
+        self.seed_transactions(1)
+        pro = Professional.objects.first()
+
+        def seed(n):
+            for shift in Shift.objects.exclude(applications__professional=pro)[:n]:
+                self.seeded += 1
+                Transaction.objects.create(
+                    user=pro.user, amount=Decimal('2700'), transaction_type='PAYOUT',
+                    reference=f'budget-payout-{self.seeded}', status='SUCCESS', shift=shift,
+                )
+
+        self.seed_transactions(8)
+        client = self.api_client(pro.user)
+        self.assertConstantQueries(client, '/api/v1/billing/transactions/', seed)
+
+    def test_invoices(self):
+        def seed(n):
+            for _ in range(n):
+                self.seeded += 1
+                Invoice.objects.create(
+                    facility=self.facility, month=timezone.now().date().replace(day=1),
+                    amount=Decimal('1000'),
+                )
+
+        client = self.api_client(self.facility.user)
+        self.assertConstantQueries(client, '/api/v1/billing/invoices/', seed)
+
+
+class ReleaseFundsTests(TestCase):
+    """Releasing funds early never costs the professional their pay."""
+
+    def setUp(self):
+        user = User.objects.create_user(email='release-facility@example.com', password='x')
+        self.facility = Facility.objects.create(
+            user=user, name='Release Hospital', address='Lagos', rc_number='RC-RELEASE', is_verified=True,
+        )
+        pro_user = User.objects.create_user(email='release-pro@example.com', password='x')
+        self.professional = Professional.objects.create(user=pro_user, license_number='LIC-RELEASE')
+        start = timezone.now() - timedelta(hours=8)
+        shift = Shift.objects.create(
+            facility=self.facility, role='Nurse', specialty='ICU', quantity_needed=1,
+            start_time=start, end_time=start + timedelta(hours=8), rate=Decimal('3000'),
+        )
+        self.application = ShiftApplication.objects.create(
+            shift=shift, professional=self.professional, status='IN_PROGRESS',
+            clock_in_time=start, check_out_code='123456',
+        )
+
+    def release(self):
+        with self.captureOnCommitCallbacks():
+            return ReleaseFundsService()(user=self.facility.user, application_id=self.application.id)
+
+    def clock_out(self):
+        with self.captureOnCommitCallbacks():
+            ClockOutService()(user=self.professional.user, shift_id=self.application.shift_id, code='123456')
+
+    def test_release_before_clock_out_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.release()
+        self.assertFalse(DuePayout.objects.exists())
+
+    def test_release_then_clock_out_pays(self):
+        with self.assertRaises(ValueError):
+            self.release()
+        self.clock_out()
+        self.release()
+        process_due_payouts()
+
+        self.professional.refresh_from_db()
+        self.assertEqual(self.professional.wallet_balance, Decimal('24000.00'))
+        self.assertEqual(DuePayout.objects.get(application=self.application).status, 'PAID')
+
+    def test_skipped_payout_is_queued_again_on_clock_out(self):
+        # A row skipped by an earlier sweep must not block the real payout
+        DuePayout.objects.create(
+            application=self.application, due_at=timezone.now(), status='SKIPPED',
+        )
+        self.clock_out()
+        payout = DuePayout.objects.get(application=self.application)
+        self.assertEqual(payout.status, 'PENDING')
+        self.assertGreater(payout.due_at, timezone.now() + timedelta(hours=23))
+
+        self.release()
+        process_due_payouts()
+        self.professional.refresh_from_db()
+        self.assertEqual(self.professional.wallet_balance, Decimal('24000.00'))
+
+
+class PayoutLedgerTests(TestCase):
+    """Every payout is credited exactly once."""
+
+    def setUp(self):
+        user = User.objects.create_user(email='ledger-facility@example.com', password='x')
+        self.facility = Facility.objects.create(
+            user=user, name='Ledger Hospital', address='Lagos', rc_number='RC-LEDGER', is_verified=True,
+        )
+        pro_user = User.objects.create_user(email='ledger-pro@example.com', password='x')
+        self.professional = Professional.objects.create(
+            user=pro_user, license_number='LIC-LEDGER', wallet_balance=Decimal('100.00'),
+        )
+
+    def completed_application(self, hours_ago=10):
+        start = timezone.now() - timedelta(hours=hours_ago)
+        shift = Shift.objects.create(
+            facility=self.facility, role='Nurse', specialty='ICU', quantity_needed=1,
+            start_time=start, end_time=start + timedelta(hours=8), rate=Decimal('3000'),
+        )
+        return ShiftApplication.objects.create(
+            shift=shift, professional=self.professional, status='COMPLETED',
+            clock_in_time=start, clock_out_time=start + timedelta(hours=8),
+        )
+
+    def test_record_paid_refuses_duplicate(self):
+        application = self.completed_application()
+        self.assertIsNotNone(DuePayout.record_paid(application, 'COMPENSATION', Decimal('500')))
+        self.assertIsNone(DuePayout.record_paid(application, 'COMPENSATION', Decimal('500')))
+        self.assertEqual(DuePayout.objects.filter(application=application).count(), 1)
+
+    def test_schedule_requeues_skipped_but_not_paid(self):
+        application = self.completed_application()
+        DuePayout.objects.create(application=application, due_at=timezone.now(), status='SKIPPED')
+        payout = DuePayout.schedule(application, delay=timedelta(hours=1))
+        self.assertEqual(payout.status, 'PENDING')
+        self.assertGreater(payout.due_at, timezone.now() + timedelta(minutes=59))
+
+        DuePayout.objects.filter(id=payout.id).update(status='PAID')
+        self.assertEqual(DuePayout.schedule(application, delay=timedelta(0)).status, 'PAID')
+
+    def test_sweep_credits_each_payout_once(self):
+        applications = [self.completed_application(hours_ago=h) for h in (10, 30)]
+        for application in applications:
+            DuePayout.schedule(application, delay=timedelta(0))
+
+        self.assertEqual(process_due_payouts(), 'Paid 2 payouts, skipped 0.')
+        self.assertEqual(process_due_payouts(), 'Paid 0 payouts, skipped 0.')
+
+        self.professional.refresh_from_db()
+        # 100 opening balance + 2 x (8h x 3000)
+        self.assertEqual(self.professional.wallet_balance, Decimal('48100.00'))
+        payouts = Transaction.objects.filter(user=self.professional.user, transaction_type='PAYOUT')
+        self.assertEqual(payouts.count(), 2)
+        self.assertEqual(
+            set(payouts.values_list('reference', flat=True)),
+            {payout.reference for payout in DuePayout.objects.all()},
+        )
+
+    def test_legacy_payout_is_not_credited_again(self):
+        application = self.completed_application()
+        # Paid before the ledger existed: only the Transaction was written
+        Transaction.objects.create(
+            user=self.professional.user, amount=Decimal('24000.00'), transaction_type='PAYOUT',
+            reference='legacy-payout', status='SUCCESS', shift=application.shift,
+        )
+        migration = importlib.import_module('billing.migrations.0007_backfill_paid_payouts')
+        migration.backfill_paid_payouts(apps, None)
+        self.assertEqual(DuePayout.objects.get(application=application).status, 'PAID')
 
-# Create your tests here.
+        # A legacy task still in the queue, then the sweep
+        payout_professional(application.id)
+        process_due_payouts()
+        self.professional.refresh_from_db()
+        self.assertEqual(self.professional.wallet_balance, Decimal('100.00'))
@@ -3,9 +3,11 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.authentication import TokenAuthentication
 from decimal import Decimal
+from core.exports import StreamingExport
+from core.pagination import CURSOR_PARAMETERS, CursorPaginator
 from core.router import route
 from .models import Invoice, Transaction, EmbedlyWallet
-from .serializers import TransactionSerializer
+from .serializers import TransactionSerializer, with_shift_applications
 from .services import WithdrawalService, ReleaseFundsService
 from .wallet_service import WalletFundingService, WalletFundingVerifyService, WalletWithdrawalService, WalletCreateService
 from .embedly_client import embedly_client
@@ -13,6 +15,7 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes,
 from rest_framework import serializers
 
 @extend_schema(
+    parameters=CURSOR_PARAMETERS,
     responses={
         200: inline_serializer(
             name='InvoiceListResponse',
@@ -37,7 +40,8 @@ class InvoiceListView(APIView):
         if not request.user.is_facility:
              return Response({"error": "Only facilities have invoices"}, status=403)
              
-        invoices = Invoice.objects.filter(facility=request.user.facility).order_by('-created_at')
+        paginator = CursorPaginator(request)
+        invoices = paginator.paginate(Invoice.objects.filter(facility=request.user.facility))
         data = [{
             "id": i.id,
             "month": i.month,
@@ -45,24 +49,84 @@ class InvoiceListView(APIView):
             "status": i.status,
             "pdf_url": i.pdf_url
         } for i in invoices]
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
-@extend_schema(responses={200: TransactionSerializer(many=True)})
+@extend_schema(parameters=CURSOR_PARAMETERS, responses={200: TransactionSerializer(many=True)})
 @route("billing/transactions/", name="transaction-list")
 class TransactionListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        transactions = (
-            Transaction.objects
-            .filter(user=request.user)
-            .select_related('shift__facility')
-            .order_by('-created_at')
+        paginator = CursorPaginator(request)
+        transactions = paginator.paginate(
+            with_shift_applications(Transaction.objects.filter(user=request.user))
         )
         serializer = TransactionSerializer(
             transactions, many=True, context={'request': request},
         )
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
+
+TRANSACTION_EXPORT = StreamingExport([
+    ('id', lambda t: str(t.id)),
+    ('created_at', lambda t: t.created_at),
+    ('type', lambda t: t.transaction_type),
+    ('amount', lambda t: t.amount),
+    ('status', lambda t: t.status),
+    ('reference', lambda t: t.reference),
+    ('shift_id', lambda t: str(t.shift_id) if t.shift_id else None),
+    ('shift_role', lambda t: t.shift.role if t.shift else None),
+    ('shift_start_time', lambda t: t.shift.start_time if t.shift else None),
+    ('facility_name', lambda t: t.shift.facility.name if t.shift else None),
+])
+
+INVOICE_EXPORT = StreamingExport([
+    ('id', lambda i: str(i.id)),
+    ('month', lambda i: i.month),
+    ('amount', lambda i: i.amount),
+    ('status', lambda i: i.status),
+    ('pdf_url', lambda i: i.pdf_url),
+    ('created_at', lambda i: i.created_at),
+])
+
+
+@extend_schema(
+    responses={(200, 'text/csv'): OpenApiTypes.BINARY, (200, 'application/x-ndjson'): OpenApiTypes.BINARY},
+    description='Full transaction history, newest first, streamed as CSV (export.csv) or JSON lines (export.jsonl).',
+)
+@route("billing/transactions/export.<str:fmt>", name="transaction-export")
+class TransactionExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, fmt):
+        transactions = (
+            Transaction.objects.filter(user=request.user)
+            .select_related('shift__facility')
+            .order_by('-created_at', '-id')
+        )
+        try:
+            return TRANSACTION_EXPORT.response(transactions, fmt, 'transactions')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+
+@extend_schema(
+    responses={(200, 'text/csv'): OpenApiTypes.BINARY, (200, 'application/x-ndjson'): OpenApiTypes.BINARY},
+    description='All invoices, newest first, streamed as CSV (export.csv) or JSON lines (export.jsonl).',
+)
+@route("billing/invoices/export.<str:fmt>", name="invoice-export")
+class InvoiceExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, fmt):
+        if not request.user.is_facility:
+            return Response({"error": "Only facilities have invoices"}, status=403)
+
+        invoices = Invoice.objects.filter(facility=request.user.facility).order_by('-created_at', '-id')
+        try:
+            return INVOICE_EXPORT.response(invoices, fmt, 'invoices')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
 
 @extend_schema(
     responses={
@@ -77,9 +141,14 @@ class ReleaseFundsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, application_id):
-        service = ReleaseFundsService()
-        result = service(user=request.user, application_id=application_id)
-        return Response(result)
+        try:
+            service = ReleaseFundsService()
+            result = service(user=request.user, application_id=application_id)
+            return Response(result)
+        except PermissionError as e:
+            return Response({'error': str(e)}, status=403)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
 
 
 # ============================================
@@ -19,35 +19,43 @@ class SendBroadcastService(BaseService):
             raise PermissionError("Not your shift.")
             
         # Find all confirmed applications
-        applications = shift.applications.filter(status__in=['CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING'])
+        applications = list(
+            shift.applications
+            .filter(status__in=['CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING'])
+            .select_related('professional__user')
+        )
         
-        if not applications.exists():
+        if not applications:
             return {"status": "no_recipients", "message": "No confirmed professionals for this shift."}
             
-        count = 0
-        for app in applications:
-            # Ensure ChatRoom exists (it should, but let's be safe)
-            chat_room, created = ChatRoom.objects.get_or_create(application=app)
-            
-            # Create Message
-            Message.objects.create(
-                room=chat_room,
+        # Ensure a ChatRoom exists for every application (it should, but let's be safe)
+        rooms = {
+            room.application_id: room
+            for room in ChatRoom.objects.filter(application__in=applications)
+        }
+        missing = [ChatRoom(application=app) for app in applications if app.id not in rooms]
+        for room in ChatRoom.objects.bulk_create(missing):
+            rooms[room.application_id] = room
+
+        Message.objects.bulk_create([
+            Message(
+                room=rooms[app.id],
                 sender=user,
                 content=f"[BROADCAST]: {message_content}",
                 is_read=False
             )
+            for app in applications
+        ])
+
+        Notification.send_many(
+            recipients=[app.professional.user for app in applications],
+            title=f"Broadcast from {shift.facility.name}",
+            message=message_content,
+            notification_type="BROADCAST",
+            related_object_id=shift.id
+        )
             
-            # Create Notification
-            Notification.send(
-                user=app.professional.user,
-                title=f"Broadcast from {shift.facility.name}",
-                message=message_content,
-                notification_type="BROADCAST",
-                related_object_id=shift.id
-            )
-            count += 1
-            
-        return {"status": "success", "recipients_count": count}
+        return {"status": "success", "recipients_count": len(applications)}
 
 class NotificationService(BaseService):
     def send_notification(self, recipient, notification_type, title, message, data=None):
@@ -1,6 +1,8 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from core.conditional import etag
+from core.pagination import CURSOR_PARAMETERS, CursorPaginator
 from core.router import route
 from .models import ChatRoom, Message
 from .services import SendBroadcastService
@@ -72,6 +74,7 @@ class ChatRoomCreateView(APIView):
         return Response({"room_id": room.id, "created": created})
 
 @extend_schema(
+    parameters=CURSOR_PARAMETERS,
     responses={
         200: inline_serializer(
             name='ChatHistoryResponse',
@@ -93,17 +96,19 @@ class ChatHistoryView(APIView):
         # Check permissions
         # ... (omitted for brevity, similar to above)
         
-        messages = room.messages.order_by('created_at')
+        paginator = CursorPaginator(request, newest_first=False)
+        messages = paginator.paginate(room.messages.select_related('sender'))
         data = [{
             "sender": m.sender.email,
             "content": m.content,
             "timestamp": m.created_at
         } for m in messages]
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
 from core.models import Notification
 
 @extend_schema(
+    parameters=CURSOR_PARAMETERS,
     responses={
         200: inline_serializer(
             name='NotificationListResponse',
@@ -124,8 +129,10 @@ from core.models import Notification
 class NotificationListView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag(lambda request: Notification.version_for(request.user))
     def get(self, request):
-        notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
+        paginator = CursorPaginator(request)
+        notifications = paginator.paginate(Notification.objects.filter(user=request.user))
         data = [{
             "id": n.id,
             "title": n.title,
@@ -135,7 +142,7 @@ class NotificationListView(APIView):
             "created_at": n.created_at,
             "data": n.data
         } for n in notifications]
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
 @extend_schema(
     responses={
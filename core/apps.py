@@ -1,6 +1,20 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        backend = settings.CACHES["default"]["BACKEND"]
+        if backend.endswith("LocMemCache") and not settings.DEBUG:
+            # Feed invalidation, ETag versions and task locks all assume one shared cache
+            logger.warning(
+                "The default cache is process-local (%s); set REDIS_CACHE_URL so web and "
+                "worker processes share it.", backend,
+            )
@@ -0,0 +1,45 @@
+import functools
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+
+
+def etag(version):
+    """
+    Conditional GET for an APIView handler.
+
+    version(request, *args, **kwargs) returns a cheap stamp of everything the
+    response depends on, such as a cache version token or an aggregate like
+    max(updated_at). The ETag combines it with the user and the query string.
+    When If-None-Match matches, a 304 is returned without calling the handler,
+    so the heavy query and rendering are skipped.
+
+        @etag(lambda request: Notification.objects.filter(...).aggregate(...))
+        def get(self, request): ...
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            stamp = version(request, *args, **kwargs)
+            tag = quote_etag(hashlib.md5(
+                repr((request.user.pk, request.get_full_path(), stamp)).encode(),
+                usedforsecurity=False,
+            ).hexdigest())
+
+            # Proxies that compress responses may hand the tag back weakened
+            sent = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+            if tag in sent or f"W/{tag}" in sent:
+                response = HttpResponseNotModified()
+            else:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = tag
+            # Per-user content: caches may store it but must revalidate every time
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: scalar core.utils.haversine vs the vectorized helpers.
+
+Usage:
+    python manage.py benchmark_haversine
+    python manage.py benchmark_haversine --sizes 1000 100000 1000000
+"""
+
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.utils import haversine, haversine_many, haversine_matrix
+
+
+class Command(BaseCommand):
+    help = 'Compares scalar and vectorized haversine distance computation'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[1_000, 100_000, 1_000_000],
+            help='Number of points to compute distances for',
+        )
+        parser.add_argument(
+            '--matrix-size', type=int, default=1_000,
+            help='Side length of the many-to-many benchmark (N x N pairs)',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        origin_lat, origin_lng = 6.4550, 3.3941  # Lagos
+
+        self.stdout.write(f"{'points':>10} {'scalar (s)':>12} {'vector (s)':>12} {'speedup':>9}")
+        for size in options['sizes']:
+            lats = [rng.uniform(4.0, 14.0) for _ in range(size)]
+            lngs = [rng.uniform(2.5, 14.5) for _ in range(size)]
+
+            start = time.perf_counter()
+            scalar = [haversine(origin_lat, origin_lng, lat, lng) for lat, lng in zip(lats, lngs)]
+            scalar_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            vector = haversine_many(origin_lat, origin_lng, lats, lngs)
+            vector_time = time.perf_counter() - start
+
+            if not np.allclose(scalar, vector):
+                self.stderr.write(self.style.ERROR(f"Results differ at size {size}"))
+
+            self.stdout.write(
+                f"{size:>10} {scalar_time:>12.4f} {vector_time:>12.4f} "
+                f"{scalar_time / vector_time:>8.1f}x"
+            )
+
+        n = options['matrix_size']
+        lats = [rng.uniform(4.0, 14.0) for _ in range(n)]
+        lngs = [rng.uniform(2.5, 14.5) for _ in range(n)]
+
+        start = time.perf_counter()
+        for lat1, lng1 in zip(lats, lngs):
+            for lat2, lng2 in zip(lats, lngs):
+                haversine(lat1, lng1, lat2, lng2)
+        scalar_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        haversine_matrix(lats, lngs, lats, lngs)
+        vector_time = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{n}x{n} matrix: scalar {scalar_time:.4f}s, vector {vector_time:.4f}s "
+            f"({scalar_time / vector_time:.1f}x)"
+        )
+        self.stdout.write(self.style.SUCCESS('Done.'))
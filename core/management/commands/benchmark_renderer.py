@@ -0,0 +1,93 @@
+"""
+Benchmark: StandardResponseRenderer on the stdlib json path vs the orjson path.
+
+Renders a shift list shaped like the shifts/ feed payload, envelope included.
+
+Usage:
+    python manage.py benchmark_renderer
+    python manage.py benchmark_renderer --rows 5000 --repeat 20
+"""
+
+import json
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.response import Response
+
+from core import renderers
+from core.renderers import StandardResponseRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compares stdlib and orjson rendering of a large shift list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5_000, help='Shifts in the list')
+        parser.add_argument('--repeat', type=int, default=20, help='Renders per path (best time is reported)')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            raise CommandError('orjson is not installed; only the stdlib path is available.')
+
+        rows = self.shift_rows(options['rows'])
+        response = Response(rows)
+        response.pagination = {"next_cursor": "x" * 60, "prev_cursor": None, "page_size": len(rows)}
+        renderer = StandardResponseRenderer()
+        context = {'response': response}
+
+        timings = {}
+        outputs = {}
+        for fast in (False, True):
+            with override_settings(FAST_JSON_RENDERER=fast):
+                best = float('inf')
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    outputs[fast] = renderer.render(rows, 'application/json', context)
+                    best = min(best, time.perf_counter() - start)
+                timings[fast] = best
+
+        if json.loads(outputs[False]) != json.loads(outputs[True]):
+            self.stderr.write(self.style.ERROR('Outputs differ between the two paths'))
+
+        size_kb = len(outputs[True]) / 1024
+        self.stdout.write(f"{len(rows)} shifts, {size_kb:,.0f} KiB per response")
+        self.stdout.write(f"{'stdlib json':>12}: {timings[False] * 1000:8.2f} ms")
+        self.stdout.write(f"{'orjson':>12}: {timings[True] * 1000:8.2f} ms")
+        self.stdout.write(f"{'speedup':>12}: {timings[False] / timings[True]:8.1f}x")
+        self.stdout.write(self.style.SUCCESS('Done.'))
+
+    def shift_rows(self, count):
+        # Same keys and value types as ShiftListCreateView builds
+        rng = random.Random(42)
+        now = timezone.now()
+        rows = []
+        for i in range(count):
+            start = now + timedelta(hours=rng.randint(1, 24 * 30))
+            rate = Decimal(rng.randint(2000, 8000))
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "facility": f"Hospital {i % 200}",
+                "facility_name": f"Hospital {i % 200}",
+                "role": "Nurse",
+                "specialty": rng.choice(["ICU", "Theatre", "Emergency", "Paediatrics"]),
+                "quantity_needed": rng.randint(1, 5),
+                "quantity_filled": 0,
+                "start_time": start,
+                "end_time": start + timedelta(hours=8),
+                "rate": rate,
+                "status": "OPEN",
+                "is_negotiable": rng.random() < 0.3,
+                "min_rate": rate - 500 if rng.random() < 0.3 else None,
+                "address": f"{rng.randint(1, 200)} Marina Road, Lagos",
+                "latitude": 6.45 + rng.uniform(-1, 1),
+                "longitude": 3.39 + rng.uniform(-1, 1),
+                "distance": round(rng.uniform(0, 50), 1),
+                "created_at": now - timedelta(minutes=i),
+            })
+        return rows
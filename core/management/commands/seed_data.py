@@ -221,6 +221,7 @@ class Command(BaseCommand):
                 current_location_lat=data['current_location_lat'],
                 current_location_lng=data['current_location_lng'],
             )
+            professional.sync_specialty_set()
             professionals.append(professional)
         
         return professionals
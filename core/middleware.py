@@ -0,0 +1,82 @@
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """
+    Database execute wrapper that records every query run while installed.
+    Queries are grouped by their SQL text with parameters left as
+    placeholders, so the same statement run per row shows up as one shape.
+    """
+
+    def __init__(self):
+        self.shapes = Counter()
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.shapes[sql] += 1
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+
+    @property
+    def count(self):
+        return sum(self.shapes.values())
+
+    def repeated(self, threshold=2):
+        """Shapes executed at least `threshold` times, most frequent first."""
+        return [(sql, n) for sql, n in self.shapes.most_common() if n >= threshold]
+
+
+class QueryCountMiddleware:
+    """
+    Counts queries per request and exposes them in debug headers:
+
+      X-Query-Count       total queries run by the request
+      X-Query-Time-Ms     time spent in the database
+      X-Query-Repeated    extra executions of identical SQL shapes (N+1 smell)
+
+    A warning naming the worst shape is logged when one repeats
+    QUERY_COUNT_REPEAT_THRESHOLD times or more. Enabled by QUERY_COUNT_HEADERS,
+    which defaults to DEBUG.
+
+    Streaming responses (the CSV/JSONL exports) run their queries while the
+    body is iterated, after this middleware has returned, so they get no
+    headers rather than a count that misses most of the work.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_COUNT_HEADERS', settings.DEBUG)
+        self.threshold = getattr(settings, 'QUERY_COUNT_REPEAT_THRESHOLD', 5)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        if response.streaming:
+            return response
+
+        repeated = counter.repeated()
+        response['X-Query-Count'] = str(counter.count)
+        response['X-Query-Time-Ms'] = f"{counter.duration * 1000:.1f}"
+        response['X-Query-Repeated'] = str(sum(n - 1 for _, n in repeated))
+
+        if repeated and repeated[0][1] >= self.threshold:
+            sql, n = repeated[0]
+            logger.warning(
+                f"Possible N+1 on {request.method} {request.path}: "
+                f"same query ran {n} times: {sql[:300]}"
+            )
+        return response
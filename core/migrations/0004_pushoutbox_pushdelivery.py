@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:48
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_devicetoken"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PushDelivery",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("notification_count", models.PositiveIntegerField(default=1)),
+                ("success", models.BooleanField(default=False)),
+                ("error_code", models.CharField(blank=True, default="", max_length=50)),
+                ("device_token", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="deliveries", to="core.devicetoken")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="push_deliveries", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="PushOutbox",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("status", models.CharField(choices=[("PENDING", "Pending"), ("SENT", "Sent"), ("FAILED", "Failed"), ("SKIPPED", "Skipped")], default="PENDING", max_length=10)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                ("notification", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name="push", to="core.notification")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["status", "created_at"], name="pushoutbox_status_created_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_pushoutbox_pushdelivery"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(fields=["user", "-created_at"], name="notif_user_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(fields=["related_object_id", "notification_type", "user"], name="notif_object_type_user_idx"),
+        ),
+    ]
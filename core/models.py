@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 import uuid
 
 class BaseModel(models.Model):
@@ -29,10 +29,30 @@ class Notification(BaseModel):
     is_read = models.BooleanField(default=False)
     related_object_id = models.UUIDField(null=True, blank=True) # Generic link to related object
     data = models.JSONField(default=dict, blank=True) # For extra context
+
+    class Meta:
+        indexes = [
+            # Notification inbox, newest first (NotificationListView)
+            models.Index(fields=['user', '-created_at'], name='notif_user_created_idx'),
+            # "Already notified?" checks (shifts.tasks.notify_matching_professionals)
+            models.Index(
+                fields=['related_object_id', 'notification_type', 'user'],
+                name='notif_object_type_user_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.email}"
 
+    @classmethod
+    def version_for(cls, user):
+        """Cheap stamp of a user's inbox (for ETags); changes on any insert, delete or save."""
+        return tuple(
+            cls.objects.filter(user=user)
+            .aggregate(count=models.Count('id'), updated=models.Max('updated_at'))
+            .values()
+        )
+
     @classmethod
     def send(cls, user, title, message, notification_type, related_object_id=None, data=None):
         """Create a notification and send a push notification to the user's devices."""
@@ -44,23 +64,55 @@ class Notification(BaseModel):
             related_object_id=related_object_id,
             data=data or {},
         )
-        # Fire-and-forget push — don't block if Firebase isn't configured
-        try:
-            from .push import send_push_to_user
-            send_push_to_user(
-                user=user,
-                title=title,
-                body=message,
-                data={
-                    'notification_id': str(notif.id),
-                    'type': notification_type,
-                    **(data or {}),
-                },
-            )
-        except Exception:
-            pass  # Push is best-effort
+        cls._enqueue_push([notif])
         return notif
 
+    @classmethod
+    def send_many(cls, recipients, title, message, notification_type, related_object_id=None, data=None):
+        """
+        Bulk variant of send(): creates every row and queues every push
+        with one INSERT each.
+
+        recipients is a list of users, or of (user, overrides) pairs where
+        overrides may replace title, message, related_object_id or data
+        for that one recipient.
+        """
+        rows = []
+        for recipient in recipients:
+            user, overrides = recipient if isinstance(recipient, tuple) else (recipient, {})
+            rows.append(cls(
+                user=user,
+                title=overrides.get('title', title),
+                message=overrides.get('message', message),
+                notification_type=notification_type,
+                related_object_id=overrides.get('related_object_id', related_object_id),
+                data=overrides.get('data', data) or {},
+            ))
+        if not rows:
+            return []
+
+        notifs = cls.objects.bulk_create(rows)
+        cls._enqueue_push(notifs)
+        return notifs
+
+    @staticmethod
+    def _enqueue_push(notifications):
+        """
+        Queue pushes in the outbox instead of calling FCM inline, so request
+        latency and open transactions never wait on Firebase. The push worker
+        is kicked once the surrounding transaction commits.
+        """
+        PushOutbox.objects.bulk_create([PushOutbox(notification=n) for n in notifications])
+
+        def kick_worker():
+            try:
+                from .tasks import drain_push_outbox
+                drain_push_outbox.delay()
+            except Exception:
+                pass  # The periodic drain will pick the entries up
+
+        transaction.on_commit(kick_worker)
+
 
 class DeviceToken(BaseModel):
     DEVICE_TYPES = (
@@ -79,3 +131,37 @@ class DeviceToken(BaseModel):
 
     def __str__(self):
         return f"{self.user.email} - {self.device_type}"
+
+
+class PushOutbox(BaseModel):
+    """A push notification waiting to be delivered by core.tasks.drain_push_outbox."""
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+        ('SKIPPED', 'Skipped'),  # No active devices, or Firebase not configured
+    )
+
+    notification = models.OneToOneField(Notification, on_delete=models.CASCADE, related_name='push')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='pushoutbox_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Push {self.status} - {self.notification_id}"
+
+
+class PushDelivery(BaseModel):
+    """Outcome of one FCM send to one device (may cover several coalesced notifications)."""
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='push_deliveries')
+    device_token = models.ForeignKey(DeviceToken, on_delete=models.SET_NULL, null=True, blank=True, related_name='deliveries')
+    notification_count = models.PositiveIntegerField(default=1)
+    success = models.BooleanField(default=False)
+    error_code = models.CharField(max_length=50, blank=True, default='')
+
+    def __str__(self):
+        return f"{self.user_id} - {'ok' if self.success else self.error_code}"
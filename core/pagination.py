@@ -0,0 +1,167 @@
+import base64
+import bisect
+import json
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+CURSOR_PARAMETERS = [
+    OpenApiParameter(name='cursor', description='Opaque cursor from pagination.next_cursor / prev_cursor', required=False, type=str),
+    OpenApiParameter(name='page_size', description=f'Items per page (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})', required=False, type=int),
+]
+
+
+def _parse_page_size(value, default):
+    if value in (None, ''):
+        return default
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValidationError({"page_size": "Must be an integer."})
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _encode_token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def _decode_token(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+class CursorPaginator:
+    """
+    Keyset pagination on (created_at, id).
+
+    Each page is a single indexed range query of page_size + 1 rows, so cost
+    stays flat however deep the client pages. Cursors are opaque tokens
+    encoding the boundary row; StandardResponseRenderer puts them in the
+    envelope's "pagination" block.
+
+    Usage in a view:
+        paginator = CursorPaginator(request)
+        items = paginator.paginate(queryset)
+        return paginator.get_paginated_response([... for item in items])
+    """
+
+    def __init__(self, request, newest_first=True, default_page_size=DEFAULT_PAGE_SIZE):
+        self.newest_first = newest_first
+        self.page_size = _parse_page_size(request.query_params.get('page_size'), default_page_size)
+        self.cursor = self._decode(request.query_params.get('cursor'))
+        self.next_cursor = None
+        self.prev_cursor = None
+
+    def paginate(self, queryset):
+        backwards = bool(self.cursor) and self.cursor['d'] == 'prev'
+        # Walking backwards means reading in the opposite order, then flipping
+        descending = self.newest_first != backwards
+        ordering = ('-created_at', '-id') if descending else ('created_at', 'id')
+        queryset = queryset.order_by(*ordering)
+
+        if self.cursor:
+            created_at, pk = self.cursor['c'], self.cursor['i']
+            if descending:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        if rows:
+            if backwards:
+                self.next_cursor = self._encode(rows[-1], 'next')
+                self.prev_cursor = self._encode(rows[0], 'prev') if has_more else None
+            else:
+                self.next_cursor = self._encode(rows[-1], 'next') if has_more else None
+                self.prev_cursor = self._encode(rows[0], 'prev') if self.cursor else None
+        return rows
+
+    def get_paginated_response(self, data):
+        response = Response(data)
+        response.pagination = {
+            "next_cursor": self.next_cursor,
+            "prev_cursor": self.prev_cursor,
+            "page_size": self.page_size,
+        }
+        return response
+
+    @staticmethod
+    def _encode(obj, direction):
+        return _encode_token({"c": obj.created_at.isoformat(), "i": str(obj.id), "d": direction})
+
+    @staticmethod
+    def _decode(cursor):
+        if not cursor:
+            return None
+        try:
+            payload = _decode_token(cursor)
+            created_at = parse_datetime(payload['c'])
+            if created_at is None or payload['d'] not in ('next', 'prev'):
+                raise ValueError
+            return {"c": created_at, "i": uuid.UUID(payload['i']), "d": payload['d']}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise ValidationError({"cursor": "Invalid cursor."})
+
+
+class RankedPaginator:
+    """
+    Keyset pagination over objects already in memory, such as cached shifts
+    sorted by distance. paginate() orders the objects by (rank(obj), id) and
+    returns the requested page. Cursors encode the boundary (rank, id) the
+    same way CursorPaginator does.
+    """
+
+    def __init__(self, request, default_page_size=DEFAULT_PAGE_SIZE):
+        self.page_size = _parse_page_size(request.query_params.get('page_size'), default_page_size)
+        self.cursor = self._decode(request.query_params.get('cursor'))
+        self.next_cursor = None
+        self.prev_cursor = None
+
+    def paginate(self, items, rank):
+        ranked = sorted(((rank(item), str(item.id)), item) for item in items)
+        keys = [key for key, _ in ranked]
+        if not self.cursor:
+            start = 0
+        elif self.cursor['d'] == 'next':
+            start = bisect.bisect_right(keys, (self.cursor['r'], self.cursor['i']))
+        else:
+            end = bisect.bisect_left(keys, (self.cursor['r'], self.cursor['i']))
+            start = max(end - self.page_size, 0)
+        page = ranked[start:start + self.page_size]
+
+        if page:
+            if start + self.page_size < len(keys):
+                self.next_cursor = self._encode(page[-1][0], 'next')
+            if start > 0:
+                self.prev_cursor = self._encode(page[0][0], 'prev')
+        return [item for _, item in page]
+
+    get_paginated_response = CursorPaginator.get_paginated_response
+
+    @staticmethod
+    def _encode(key, direction):
+        return _encode_token({"r": key[0], "i": key[1], "d": direction})
+
+    @staticmethod
+    def _decode(cursor):
+        if not cursor:
+            return None
+        try:
+            payload = _decode_token(cursor)
+            if not isinstance(payload['r'], (int, float)) or payload['d'] not in ('next', 'prev'):
+                raise ValueError
+            return {"r": payload['r'], "i": str(uuid.UUID(payload['i'])), "d": payload['d']}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise ValidationError({"cursor": "Invalid cursor."})
@@ -7,7 +7,9 @@ Setup:
 3. Save the JSON file and set FIREBASE_CREDENTIALS_PATH in settings.py
    OR set FIREBASE_CREDENTIALS_JSON env var with the JSON content
 """
+import json
 import logging
+from collections import defaultdict
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -74,13 +76,123 @@ def send_push_to_users(users, title, body, data=None):
     return _send_to_tokens(tokens, title, body, data)
 
 
+def deliver_outbox_entries(entries):
+    """
+    Deliver a batch of PushOutbox entries and record the outcome.
+
+    Pending pushes are coalesced per device token, so a device with several
+    queued notifications gets one push for the latest (carrying the count).
+    Tokens are resolved to their current owner at delivery time, so a device
+    re-registered to another user only receives that user's notifications.
+    Devices receiving identical payloads share multicast batches, and every
+    token's result is stored as a PushDelivery row. Every entry leaves PENDING.
+    """
+    from django.utils import timezone
+    from .models import DeviceToken, PushDelivery, PushOutbox
+
+    if not entries:
+        return 0
+
+    now = timezone.now()
+    entry_ids = [e.id for e in entries]
+    if not _init_firebase():
+        PushOutbox.objects.filter(id__in=entry_ids).update(
+            status='SKIPPED', processed_at=now, updated_at=now,
+        )
+        return 0
+
+    notifs_by_user = defaultdict(list)
+    for entry in entries:
+        notifs_by_user[entry.notification.user_id].append(entry.notification)
+
+    notifs_by_token = {}
+    for device in DeviceToken.objects.filter(
+        user_id__in=notifs_by_user.keys(), is_active=True,
+    ).only('id', 'user_id', 'token'):
+        notifs_by_token[device.token] = (device, notifs_by_user[device.user_id])
+
+    groups = {}
+    for device, notifs in notifs_by_token.values():
+        latest, title, body, data = _coalesce(notifs)
+        key = (title, body, json.dumps(data, sort_keys=True, default=str))
+        group = groups.setdefault(key, {'title': title, 'body': body, 'data': data, 'latest': set(), 'devices': []})
+        group['latest'].add(latest.id)
+        group['devices'].append((device, notifs))
+
+    deliveries = []
+    delivered, attempted = set(), set()
+    for group in groups.values():
+        # A shared multicast can only carry one id, so only include it when unambiguous
+        if len(group['latest']) == 1:
+            (latest_id,) = group['latest']
+            group['data'] = {'notification_id': str(latest_id), **group['data']}
+        tokens = [device.token for device, _ in group['devices']]
+        outcomes = _send_multicast(tokens, group['title'], group['body'], group['data'])
+        for (device, notifs), (success, error_code) in zip(group['devices'], outcomes):
+            deliveries.append(PushDelivery(
+                user_id=device.user_id,
+                device_token=device,
+                notification_count=len(notifs),
+                success=success,
+                error_code=error_code,
+            ))
+            notif_ids = {n.id for n in notifs}
+            attempted |= notif_ids
+            if success:
+                delivered |= notif_ids
+    PushDelivery.objects.bulk_create(deliveries)
+
+    statuses = defaultdict(list)
+    for entry in entries:
+        if entry.notification_id in delivered:
+            statuses['SENT'].append(entry.id)
+        elif entry.notification_id in attempted:
+            statuses['FAILED'].append(entry.id)
+        else:
+            statuses['SKIPPED'].append(entry.id)
+    for status, ids in statuses.items():
+        PushOutbox.objects.filter(id__in=ids).update(
+            status=status, processed_at=now, updated_at=now,
+        )
+
+    return len(statuses['SENT'])
+
+
+def _coalesce(notifications):
+    """Build one (latest, title, body, data) payload for a device's pending notifications."""
+    latest = max(notifications, key=lambda n: n.created_at)
+    data = {
+        'type': latest.notification_type,
+        **(latest.data or {}),
+    }
+    if len(notifications) == 1:
+        return latest, latest.title, latest.message, data
+
+    data['coalesced_count'] = len(notifications)
+    return (
+        latest,
+        f"{latest.title} (+{len(notifications) - 1} more)",
+        latest.message,
+        data,
+    )
+
+
 def _send_to_tokens(tokens, title, body, data=None):
     """Send FCM message to a list of device tokens."""
+    outcomes = _send_multicast(tokens, title, body, data)
+    return sum(1 for success, _ in outcomes if success)
+
+
+def _send_multicast(tokens, title, body, data=None):
+    """
+    Send FCM message to a list of device tokens.
+    Returns a (success, error_code) pair for each token, in order.
+    """
     from firebase_admin import messaging
     from .models import DeviceToken
 
     # FCM supports max 500 tokens per multicast
-    sent = 0
+    outcomes = []
     failed_tokens = []
 
     for i in range(0, len(tokens), 500):
@@ -112,21 +224,24 @@ def _send_to_tokens(tokens, title, body, data=None):
 
         try:
             response = messaging.send_each_for_multicast(message)
-            sent += response.success_count
 
             # Deactivate tokens that failed with unregistered/invalid errors
             for idx, send_response in enumerate(response.responses):
                 if send_response.exception:
-                    exc_code = getattr(send_response.exception, 'code', '')
+                    exc_code = getattr(send_response.exception, 'code', '') or 'UNKNOWN'
+                    outcomes.append((False, str(exc_code)))
                     if exc_code in ('NOT_FOUND', 'UNREGISTERED', 'INVALID_ARGUMENT'):
                         failed_tokens.append(batch[idx])
+                else:
+                    outcomes.append((True, ''))
 
         except Exception as e:
             logger.error(f"FCM send error: {e}")
+            outcomes.extend((False, 'SEND_ERROR') for _ in batch)
 
     # Clean up invalid tokens
     if failed_tokens:
         DeviceToken.objects.filter(token__in=failed_tokens).update(is_active=False)
         logger.info(f"Deactivated {len(failed_tokens)} invalid FCM tokens")
 
-    return sent
+    return outcomes
@@ -1,8 +1,75 @@
+from decimal import Decimal
+
+from django.conf import settings
 from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Fast rendering is optional; the stdlib path still works
+    orjson = None
+
+# Matches DRF's encoder: "Z" for UTC, non-string dict keys coerced to strings
+_ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_drf_encoder = JSONEncoder()
+
+
+def _orjson_default(obj):
+    # orjson handles str/int/float/dict/list/datetime/UUID natively; the rest
+    # goes through DRF's encoder so both paths produce the same JSON
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return _drf_encoder.default(obj)
+
+
+def fast_json_dumps(data):
+    """
+    Serialize like DRF's JSONRenderer (compact, UTF-8), using orjson.
+
+    One difference: orjson writes NaN and +/-Infinity as null, where DRF's
+    strict encoder raises "Out of range float values are not JSON compliant".
+    """
+    ret = orjson.dumps(data, default=_orjson_default, option=_ORJSON_OPTIONS)
+    # DRF escapes these so the output is a strict JavaScript subset
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
 
 class StandardResponseRenderer(JSONRenderer):
+    """
+    Wraps every payload in the standard envelope. With FAST_JSON_RENDERER on
+    and orjson installed, compact responses are encoded by orjson; indented
+    output (e.g. "Accept: application/json; indent=4") and anything orjson
+    rejects go through DRF's stdlib encoder as before. Non-finite floats
+    render as null on the fast path instead of failing the response.
+    """
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
-        status_code = renderer_context['response'].status_code
+        response_data = self.envelope(data, renderer_context['response'])
+
+        if self.use_fast_path(accepted_media_type, renderer_context):
+            try:
+                return fast_json_dumps(response_data)
+            except orjson.JSONEncodeError:
+                # e.g. integers beyond 64 bits, or types neither encoder knows
+                pass
+        return super().render(response_data, accepted_media_type, renderer_context)
+
+    def use_fast_path(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and getattr(settings, 'FAST_JSON_RENDERER', True)
+            and self.compact and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def envelope(self, data, response):
+        """
+        Build the envelope around the payload. The payload is referenced, not
+        copied; only its message/error/errors keys are moved up.
+        """
+        status_code = response.status_code
         response_data = {
             "success": 200 <= status_code < 300,
             "status_code": status_code,
@@ -10,6 +77,11 @@ class StandardResponseRenderer(JSONRenderer):
             "data": data,
         }
 
+        # Cursors set by core.pagination.CursorPaginator
+        pagination = getattr(response, 'pagination', None)
+        if pagination is not None:
+            response_data["pagination"] = pagination
+
         # If data contains 'message', use it and remove from data
         if isinstance(data, dict):
             if "message" in data:
@@ -19,11 +91,11 @@ class StandardResponseRenderer(JSONRenderer):
             if "errors" in data:
                 response_data["errors"] = data.pop("errors")
                 response_data["success"] = False
-            
+
             # If the original data was just message/errors, 'data' might be empty or partial.
             # Adjust logic to ensure 'data' field contains the actual payload.
             # However, for error responses, 'data' should be null as per requirements.
             if not response_data["success"]:
                 response_data["data"] = None
-            
-        return super().render(response_data, accepted_media_type, renderer_context)
+
+        return response_data
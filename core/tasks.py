@@ -0,0 +1,33 @@
+from celery import shared_task
+from django.db import transaction
+from .models import PushOutbox
+from .push import deliver_outbox_entries
+
+PUSH_BATCH_SIZE = 500
+
+
+@shared_task
+def drain_push_outbox(batch_size=PUSH_BATCH_SIZE):
+    """
+    Deliver queued pushes until the outbox is empty.
+
+    Runs on the dedicated 'push' queue. Rows are claimed with
+    SKIP LOCKED so several push workers can drain in parallel.
+    """
+    delivered = 0
+    processed = 0
+    while True:
+        with transaction.atomic():
+            entries = list(
+                PushOutbox.objects
+                .select_for_update(skip_locked=True, of=('self',))
+                .filter(status='PENDING')
+                .select_related('notification')
+                .order_by('created_at')[:batch_size]
+            )
+            if not entries:
+                break
+            delivered += deliver_outbox_entries(entries)
+            processed += len(entries)
+
+    return f"Processed {processed} queued pushes, delivered {delivered}."
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for catching N+1 queries on list endpoints.
+
+    assertConstantQueries requests the endpoint, seeds more rows, requests it
+    again and fails if the query count moved. An N+1 shows up as a count that
+    grows with the number of rows; a fixed budget can be enforced on top.
+    The cache is cleared before each request, so cached endpoints are
+    measured on their cold path.
+    """
+
+    def api_client(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def count_queries(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, msg=response.content[:500])
+        return len(ctx.captured_queries), ctx.captured_queries
+
+    def assertConstantQueries(self, client, url, seed, budget=None, small=2, large=8):
+        seed(small)
+        before, _ = self.count_queries(client, url)
+        seed(large - small)
+        after, queries = self.count_queries(client, url)
+        self.assertEqual(
+            before, after,
+            msg=f"{url} ran {before} queries for {small} rows but {after} for {large}:\n"
+            + "\n".join(q['sql'] for q in queries),
+        )
+        if budget is not None:
+            self.assertLessEqual(after, budget, msg=f"{url} is over its query budget")
+        return after
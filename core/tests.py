@@ -1,3 +1,155 @@
-from django.test import TestCase
+import json
+import unittest
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from . import push, renderers
+from .exports import StreamingExport
+from .middleware import QueryCountMiddleware
+from .models import DeviceToken, Notification, PushDelivery, PushOutbox
+from .pagination import CursorPaginator, RankedPaginator, _encode_token
+from .testing import QueryBudgetMixin
+
+
+class NotificationQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='notify@example.com', password='x')
+
+    def seed(self, n):
+        Notification.objects.bulk_create(
+            Notification(user=self.user, title='New Shift Available', message='-', notification_type='SHIFT_POSTED')
+            for _ in range(n)
+        )
+
+    def test_notification_list(self):
+        self.assertConstantQueries(self.api_client(self.user), '/api/v1/notifications/', self.seed)
+
+
+class QueryCountMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='headers@example.com', password='x')
+        self.client.force_login(self.user)
+
+    @override_settings(QUERY_COUNT_HEADERS=True)
+    def test_headers_when_enabled(self):
+        response = self.client.get('/api/v1/notifications/')
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        self.assertIn('X-Query-Time-Ms', response)
+        self.assertEqual(response['X-Query-Repeated'], '0')
+
+    @override_settings(QUERY_COUNT_HEADERS=False)
+    def test_no_headers_when_disabled(self):
+        response = self.client.get('/api/v1/notifications/')
+        self.assertNotIn('X-Query-Count', response)
+
+    @override_settings(QUERY_COUNT_HEADERS=True)
+    def test_no_headers_on_streaming_responses(self):
+        # The body's queries run after the middleware returns; a count would lie
+        rows = Notification.objects.values_list('title', flat=True)
+        middleware = QueryCountMiddleware(lambda request: StreamingHttpResponse(rows.iterator()))
+        response = middleware(RequestFactory().get('/export/'))
+        self.assertNotIn('X-Query-Count', response)
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+
+class PushOutboxDeliveryTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create_user(email='push-a@example.com', password='x')
+        self.bob = User.objects.create_user(email='push-b@example.com', password='x')
+
+    def queue(self, user, title):
+        notification = Notification.objects.create(
+            user=user, title=title, message='-', notification_type='SHIFT_POSTED',
+        )
+        return PushOutbox.objects.create(notification=notification)
+
+    @mock.patch.object(push, '_init_firebase', return_value=True)
+    @mock.patch.object(push, '_send_multicast', side_effect=lambda tokens, *a: [(True, '')] * len(tokens))
+    def test_coalesces_per_token_for_its_current_owner(self, send, _init):
+        first = self.queue(self.alice, 'Shift one')
+        # The phone changes hands between the two notifications
+        DeviceToken.objects.create(user=self.bob, token='phone', device_type='android')
+        second = self.queue(self.bob, 'Shift two')
+        third = self.queue(self.bob, 'Shift three')
+
+        sent = push.deliver_outbox_entries(list(PushOutbox.objects.select_related('notification')))
+
+        self.assertEqual(sent, 2)
+        send.assert_called_once()
+        self.assertEqual(send.call_args.args[:2], (['phone'], 'Shift three (+1 more)'))
+        delivery = PushDelivery.objects.get()
+        self.assertEqual((delivery.user, delivery.notification_count), (self.bob, 2))
+        statuses = dict(PushOutbox.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {first.id: 'SKIPPED', second.id: 'SENT', third.id: 'SENT'})
+
+
+class CursorValidationTests(TestCase):
+    """Malformed cursors are a 400, never a 500 from the database."""
+
+    def request(self, cursor):
+        return Request(RequestFactory().get('/', {'cursor': cursor}))
+
+    def test_cursor_with_non_uuid_id(self):
+        cursor = _encode_token({"c": "2026-01-01T00:00:00+00:00", "i": "nope", "d": "next"})
+        with self.assertRaises(ValidationError):
+            CursorPaginator(self.request(cursor))
+        with self.assertRaises(ValidationError):
+            RankedPaginator(self.request(_encode_token({"r": 1.5, "i": 7, "d": "next"})))
+
+    def test_notification_list_rejects_bad_cursor(self):
+        user = get_user_model().objects.create_user(email='cursor@example.com', password='x')
+        self.client.force_login(user)
+        cursor = _encode_token({"c": "2026-01-01T00:00:00+00:00", "i": "nope", "d": "next"})
+        response = self.client.get('/api/v1/notifications/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+
+
+class StreamingExportTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(email='export@example.com', password='x')
+        Notification.objects.create(user=user, title='=HYPERLINK("http://x")', message='-@home')
+        self.export = StreamingExport([
+            ('title', lambda n: n.title),
+            ('message', lambda n: n.message),
+            ('amount', lambda n: Decimal('3000.00')),
+        ])
+
+    def test_csv_neutralizes_formulas(self):
+        lines = list(self.export.csv_lines(Notification.objects.all()))
+        self.assertEqual(lines[1], '"\'=HYPERLINK(""http://x"")",\'-@home,3000.00\r\n')
+
+    def test_jsonl_money_as_string(self):
+        line = next(self.export.jsonl_lines(Notification.objects.all()))
+        self.assertEqual(json.loads(line), {"title": '=HYPERLINK("http://x")', "message": '-@home', "amount": "3000.00"})
+
+
+@unittest.skipIf(renderers.orjson is None, 'orjson is not installed')
+class FastRendererTests(TestCase):
+
+    def render(self, data):
+        context = {'response': Response(data)}
+        return renderers.StandardResponseRenderer().render(data, 'application/json', context)
+
+    def test_matches_stdlib_output(self):
+        data = {"id": 1, "rate": Decimal('3000.00'), "name": "Clinic\u2028", "tags": ["a"]}
+        with override_settings(FAST_JSON_RENDERER=False):
+            expected = self.render(dict(data))
+        self.assertEqual(self.render(dict(data)), expected)
+
+    def test_non_finite_floats_render_as_null(self):
+        # The stdlib path refuses these under STRICT_JSON; the fast path does not
+        self.assertEqual(json.loads(self.render({"distance": float('nan')}))['data'], {"distance": None})
+        with override_settings(FAST_JSON_RENDERER=False), self.assertRaises(ValueError):
+            self.render({"distance": float('nan')})
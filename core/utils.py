@@ -1,4 +1,15 @@
 import math
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+from django.core.cache import cache
+
+EARTH_RADIUS_KM = 6371
+
+# Size of the lat/lng grid used to index professional locations.
+# 0.25° is ~28 km at the equator, so a 50 km search touches a handful of cells.
+GRID_CELL_DEGREES = 0.25
 
 def haversine(lat1, lon1, lat2, lon2):
     """
@@ -13,5 +24,90 @@ def haversine(lat1, lon1, lat2, lon2):
     dlat = lat2 - lat1 
     a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
     c = 2 * math.asin(math.sqrt(a)) 
-    r = 6371 # Radius of earth in kilometers. Use 3956 for miles
+    r = EARTH_RADIUS_KM # Use 3956 for miles
     return c * r
+
+def _haversine_np(lat1, lon1, lat2, lon2):
+    # Inputs are radians and must broadcast against each other
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def haversine_many(lat, lon, lats, lons):
+    """
+    Distances in km from one origin to many points, as a NumPy array.
+    lats/lons can be any sequence of decimal degrees of equal length.
+    """
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lons = np.radians(np.asarray(lons, dtype=np.float64))
+    return _haversine_np(math.radians(lat), math.radians(lon), lats, lons)
+
+def haversine_matrix(lats1, lons1, lats2, lons2):
+    """
+    Pairwise distances in km between two sets of points.
+    Returns an array of shape (len(lats1), len(lats2)).
+    """
+    lats1 = np.radians(np.asarray(lats1, dtype=np.float64))[:, np.newaxis]
+    lons1 = np.radians(np.asarray(lons1, dtype=np.float64))[:, np.newaxis]
+    lats2 = np.radians(np.asarray(lats2, dtype=np.float64))[np.newaxis, :]
+    lons2 = np.radians(np.asarray(lons2, dtype=np.float64))[np.newaxis, :]
+    return _haversine_np(lats1, lons1, lats2, lons2)
+
+def _grid_col(col, cell_degrees=GRID_CELL_DEGREES):
+    # Wrap around the antimeridian so columns stay in [-180°, 180°)
+    cols = int(round(360 / cell_degrees))
+    return (col + cols // 2) % cols - cols // 2
+
+def grid_cell(lat, lng, cell_degrees=GRID_CELL_DEGREES):
+    """
+    Return the grid cell key ("row:col") containing the given point,
+    or None if either coordinate is missing.
+    """
+    if lat is None or lng is None:
+        return None
+    row = math.floor(lat / cell_degrees)
+    col = _grid_col(math.floor(lng / cell_degrees), cell_degrees)
+    return f"{row}:{col}"
+
+def _box_deltas(lat, radius_km):
+    # Half-width of a circle's bounding box, in degrees of latitude and longitude
+    dlat = radius_km / 111.0
+    # Longitude degrees shrink towards the poles; clamp to avoid dividing by ~0
+    dlng = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+    return dlat, min(dlng, 180.0)
+
+def grid_cells_within(lat, lng, radius_km, cell_degrees=GRID_CELL_DEGREES):
+    """
+    Return the keys of every grid cell overlapping the bounding box of a
+    circle of radius_km around the given point. Callers still need an exact
+    distance check on whatever they fetch from these cells.
+    """
+    dlat, dlng = _box_deltas(lat, radius_km)
+
+    min_row = math.floor(max(lat - dlat, -90.0) / cell_degrees)
+    max_row = math.floor(min(lat + dlat, 90.0) / cell_degrees)
+    min_col = math.floor((lng - dlng) / cell_degrees)
+    max_col = math.floor((lng + dlng) / cell_degrees)
+
+    cells = set()
+    for row in range(min_row, max_row + 1):
+        for col in range(min_col, max_col + 1):
+            cells.add(f"{row}:{_grid_col(col, cell_degrees)}")
+    return sorted(cells)
+
+@contextmanager
+def cache_lock(key, timeout):
+    """
+    Best-effort distributed lock on the shared cache. Yields True if the lock
+    was acquired, False if another holder has it. The timeout caps how long a
+    crashed holder can keep the lock.
+    """
+    token = uuid.uuid4().hex
+    acquired = cache.add(key, token, timeout)
+    try:
+        yield acquired
+    finally:
+        # Only release our own lock, not one re-acquired after our timeout
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
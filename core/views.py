@@ -1,15 +1,21 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from drf_spectacular.utils import extend_schema
+from core.conditional import etag
+from core.pagination import CURSOR_PARAMETERS, CursorPaginator
 from core.router import route
 from core.models import Notification, DeviceToken
 
+@extend_schema(parameters=CURSOR_PARAMETERS)
 @route("notifications/", name="notification-list")
 class NotificationListView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag(lambda request: Notification.version_for(request.user))
     def get(self, request):
-        notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
+        paginator = CursorPaginator(request)
+        notifications = paginator.paginate(Notification.objects.filter(user=request.user))
         data = [{
             "id": notification.id,
             "title": notification.title,
@@ -19,7 +25,7 @@ class NotificationListView(APIView):
             "created_at": notification.created_at,
             "related_object_id": notification.related_object_id
         } for notification in notifications]
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
 @route("notifications/<uuid:notification_id>/read/", name="notification-read")
 class NotificationReadView(APIView):
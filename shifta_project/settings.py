@@ -78,8 +78,14 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.QueryCountMiddleware",
 ]
 
+# Per-request query counts in X-Query-* response headers (see core.middleware)
+QUERY_COUNT_HEADERS = DEBUG
+# Log a possible N+1 when one SQL shape repeats this many times in a request
+QUERY_COUNT_REPEAT_THRESHOLD = 5
+
 ROOT_URLCONF = "shifta_project.urls"
 
 TEMPLATES = [
@@ -172,6 +178,10 @@ REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "core.exceptions.custom_exception_handler",
 }
 
+# Encode API responses with orjson when it is installed (see core.renderers).
+# Benchmark with: python manage.py benchmark_renderer
+FAST_JSON_RENDERER = True
+
 # Swagger Settings
 SPECTACULAR_SETTINGS = {
     "TITLE": "Shifta API",
@@ -180,6 +190,26 @@ SPECTACULAR_SETTINGS = {
     "SERVE_INCLUDE_SCHEMA": False,
 }
 
+# Cache - shared across web and worker processes (also backs task locks).
+# Without REDIS_CACHE_URL each process gets its own local-memory cache: fine
+# for development, but task locks and feed invalidation then stop at the
+# process boundary, so every deployed process must set it. Tests use
+# shifta_project.test_settings, which always uses local memory.
+REDIS_CACHE_URL = os.environ.get("REDIS_CACHE_URL")
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Celery Settings
 CELERY_BROKER_URL = "redis://localhost:6379/0"
 CELERY_RESULT_BACKEND = "redis://localhost:6379/0"
@@ -188,12 +218,57 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
 
+# Push delivery runs on its own queue so FCM latency never delays other tasks.
+# Start a consumer with: celery -A shifta_project worker -Q push
+CELERY_TASK_ROUTES = {
+    "core.tasks.drain_push_outbox": {"queue": "push"},
+}
+
+# New-shift notifications go out in waves, best-scored professionals first.
+# "delay" is seconds after the previous wave; a "size" of None means everyone left.
+SHIFT_NOTIFICATION_WAVES = [
+    {"delay": 0, "size": 25},
+    {"delay": 5 * 60, "size": 100},
+    {"delay": 15 * 60, "size": None},
+]
+# Stop sending waves once there are this many pending applications per open slot
+SHIFT_NOTIFICATION_PENDING_PER_SLOT = 3
+
+# Open-shift feed entries in the shared cache (see shifts.feed_cache). Entries are
+# invalidated when shifts change; this only bounds how long orphaned ones linger.
+OPEN_SHIFT_FEED_CACHE_TIMEOUT = 10 * 60
+
+# Professional nearby feed (shifts/professional/?sort=distance)
+NEARBY_SHIFTS_DEFAULT_RADIUS_KM = 50
+NEARBY_SHIFTS_MAX_RADIUS_KM = 500
+
+# Periodic maintenance tasks work in short per-chunk transactions so several
+# workers can drain a backlog together (see shifts.tasks.close_expired_shifts)
+MAINTENANCE_CHUNK_SIZE = 500
+MAINTENANCE_PARALLEL_WORKERS = 1
+
 # Celery Beat - periodic tasks
 CELERY_BEAT_SCHEDULE = {
     "close-expired-shifts": {
         "task": "shifts.tasks.close_expired_shifts",
         "schedule": 60 * 60,  # Run every hour
     },
+    "expire-due-shifts": {
+        "task": "shifts.tasks.expire_due_shifts",
+        "schedule": 60,  # Processes only the minute buckets that are due
+    },
+    "reconcile-professional-stats": {
+        "task": "shifts.tasks.reconcile_professional_stats",
+        "schedule": 24 * 60 * 60,  # Daily drift check for the incremental counters
+    },
+    "process-due-payouts": {
+        "task": "billing.tasks.process_due_payouts",
+        "schedule": 60,  # Credits payouts in batches once they fall due
+    },
+    "drain-push-outbox": {
+        "task": "core.tasks.drain_push_outbox",
+        "schedule": 60,  # Safety net; sends normally kick the worker directly
+    },
 }
 
 # Custom User Model
@@ -0,0 +1,15 @@
+"""
+Settings for the test suite:
+
+    python manage.py test --settings=shifta_project.test_settings
+
+Tests clear the cache between requests, so they get a private local-memory
+cache instead of whatever REDIS_CACHE_URL points at.
+"""
+from .settings import *  # noqa: F401,F403
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
@@ -14,12 +14,14 @@ FACILITY removes a confirmed professional:
   < 2 h before shift  →  60 % refund, 40 % comp to professional
 """
 
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from core.services import BaseService
 from core.models import Notification
 from .models import Shift, ShiftApplication
-from .rating_service import RatingService, refresh_professional_stats
-from billing.models import Transaction
+from .selectors import ShiftSelector
+from .feed_cache import invalidate_open_shift_feed
+from .rating_service import RatingService, record_professional_stats
+from billing.models import DuePayout, Transaction
 from decimal import Decimal
 from django.utils import timezone
 import uuid
@@ -40,6 +42,7 @@ def auto_promote_from_backlog(shift):
     if shift.status == 'FILLED':
         shift.status = 'OPEN'
         shift.save(update_fields=['status', 'updated_at'])
+        invalidate_open_shift_feed(shift)
 
     pending_apps = (
         ShiftApplication.objects
@@ -48,12 +51,10 @@ def auto_promote_from_backlog(shift):
         .order_by('created_at')
     )
 
+    selector = ShiftSelector()
     for candidate in pending_apps:
-        has_clash = ShiftApplication.objects.filter(
-            professional=candidate.professional,
-            status__in=['CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING'],
-            shift__start_time__lt=shift.end_time,
-            shift__end_time__gt=shift.start_time,
+        has_clash = selector.clashing_applications(
+            [candidate.professional_id], shift.start_time, shift.end_time,
         ).exists()
         if has_clash:
             continue
@@ -62,12 +63,18 @@ def auto_promote_from_backlog(shift):
         candidate.status = 'CONFIRMED'
         candidate.check_in_code = ShiftApplication.generate_code()
         candidate.check_out_code = ShiftApplication.generate_code()
-        candidate.save()
+        try:
+            with transaction.atomic():
+                candidate.save()
+        except IntegrityError:
+            # Booked elsewhere concurrently (app_no_overlapping_bookings)
+            continue
 
         shift.quantity_filled += 1
         if shift.quantity_filled >= shift.quantity_needed:
             shift.status = 'FILLED'
         shift.save()
+        invalidate_open_shift_feed(shift)
 
         pro_name = _pro_display_name(candidate.professional)
 
@@ -86,25 +93,30 @@ def auto_promote_from_backlog(shift):
         send_shift_promotion_email(candidate)
 
         # Auto-reject clashing PENDING apps at other shifts
-        clashing = ShiftApplication.objects.filter(
-            professional=candidate.professional,
-            status='PENDING',
-            shift__start_time__lt=shift.end_time,
-            shift__end_time__gt=shift.start_time,
+        clashing = selector.clashing_applications(
+            [candidate.professional_id], shift.start_time, shift.end_time,
+            statuses=['PENDING'],
         ).exclude(shift=shift).select_related('shift__facility__user')
-
-        for clash_app in clashing:
-            clash_app.status = 'REJECTED'
-            clash_app.save(update_fields=['status', 'updated_at'])
-            Notification.send(
-                user=clash_app.shift.facility.user,
+        clashing = list(clashing)
+
+        if clashing:
+            ShiftApplication.objects.filter(
+                id__in=[clash_app.id for clash_app in clashing]
+            ).update(status='REJECTED', updated_at=timezone.now())
+            Notification.send_many(
+                recipients=[
+                    (clash_app.shift.facility.user, {
+                        'message': (
+                            f"{pro_name} has been confirmed for another shift at the same time "
+                            f"and is no longer available for '{clash_app.shift.role}'."
+                        ),
+                        'related_object_id': clash_app.id,
+                    })
+                    for clash_app in clashing
+                ],
                 title="Applicant No Longer Available",
-                message=(
-                    f"{pro_name} has been confirmed for another shift at the same time "
-                    f"and is no longer available for '{clash_app.shift.role}'."
-                ),
+                message="",
                 notification_type="CANCELLED",
-                related_object_id=clash_app.id,
             )
 
         return candidate
@@ -169,8 +181,11 @@ class FacilityCancelShiftService(BaseService):
         shift.facility.wallet_balance += refund_amount
         shift.facility.save(update_fields=['wallet_balance'])
 
-        application.professional.wallet_balance += compensation
-        application.professional.save(update_fields=['wallet_balance'])
+        # Insert-or-skip in the payout ledger so compensation is only paid once
+        payout = DuePayout.record_paid(application, 'COMPENSATION', compensation)
+        if payout:
+            application.professional.wallet_balance += compensation
+            application.professional.save(update_fields=['wallet_balance'])
 
         # Transaction logs
         Transaction.objects.create(
@@ -178,11 +193,12 @@ class FacilityCancelShiftService(BaseService):
             transaction_type='REFUND', reference=str(uuid.uuid4()),
             status='SUCCESS', shift=shift,
         )
-        Transaction.objects.create(
-            user=application.professional.user, amount=compensation,
-            transaction_type='PAYOUT', reference=str(uuid.uuid4()),
-            status='SUCCESS', shift=shift,
-        )
+        if payout:
+            Transaction.objects.create(
+                user=application.professional.user, amount=compensation,
+                transaction_type='PAYOUT', reference=payout.reference,
+                status='SUCCESS', shift=shift,
+            )
 
         # Update application
         application.status = 'CANCELLED'
@@ -193,6 +209,7 @@ class FacilityCancelShiftService(BaseService):
         # Update shift
         shift.quantity_filled -= 1
         shift.save()
+        invalidate_open_shift_feed(shift)
 
         # Notify the professional
         pro_name = _pro_display_name(application.professional)
@@ -282,6 +299,9 @@ class ProfessionalCancelShiftService(BaseService):
         # Reopen slot
         shift.quantity_filled -= 1
         shift.save()
+        invalidate_open_shift_feed(shift)
+
+        record_professional_stats(application.professional, cancelled=1)
 
         # Auto-rating penalty
         if auto_rating is not None:
@@ -291,9 +311,6 @@ class ProfessionalCancelShiftService(BaseService):
                 comment=f"Auto-review: {tier_label} cancellation ({reason})",
                 reviewer_user=shift.facility.user,
             )
-        else:
-            # Still refresh stats for cancellation tracking
-            refresh_professional_stats(application.professional)
 
         # Notify facility
         pro_name = _pro_display_name(application.professional)
@@ -376,14 +393,16 @@ class FacilityDeleteShiftService(BaseService):
         for app in confirmed_apps:
             compensation = cost_per_slot * Decimal('0.40')  # 40% comp for deletion
 
-            app.professional.wallet_balance += compensation
-            app.professional.save(update_fields=['wallet_balance'])
+            payout = DuePayout.record_paid(app, 'COMPENSATION', compensation)
+            if payout:
+                app.professional.wallet_balance += compensation
+                app.professional.save(update_fields=['wallet_balance'])
 
-            Transaction.objects.create(
-                user=app.professional.user, amount=compensation,
-                transaction_type='PAYOUT', reference=str(uuid.uuid4()),
-                status='SUCCESS', shift=shift,
-            )
+                Transaction.objects.create(
+                    user=app.professional.user, amount=compensation,
+                    transaction_type='PAYOUT', reference=payout.reference,
+                    status='SUCCESS', shift=shift,
+                )
 
             app.status = 'CANCELLED'
             app.cancelled_by = 'FACILITY'
@@ -424,6 +443,7 @@ class FacilityDeleteShiftService(BaseService):
 
         shift.status = 'CANCELLED'
         shift.save(update_fields=['status', 'updated_at'])
+        invalidate_open_shift_feed(shift)
 
         return {
             "status": "success",
@@ -481,20 +501,24 @@ class FacilityEndShiftEarlyService(BaseService):
 
             total_pay = base_pay + bonus
 
-            # Pay professional
-            app.professional.wallet_balance += total_pay
-            app.professional.save(update_fields=['wallet_balance'])
+            # Pay professional (recorded as the shift pay, so a later
+            # release-funds request cannot pay this application again)
+            payout = DuePayout.record_paid(app, 'SHIFT_PAY', total_pay)
+            if payout:
+                app.professional.wallet_balance += total_pay
+                app.professional.save(update_fields=['wallet_balance'])
 
-            Transaction.objects.create(
-                user=app.professional.user, amount=total_pay,
-                transaction_type='PAYOUT', reference=str(uuid.uuid4()),
-                status='SUCCESS', shift=shift,
-            )
+                Transaction.objects.create(
+                    user=app.professional.user, amount=total_pay,
+                    transaction_type='PAYOUT', reference=payout.reference,
+                    status='SUCCESS', shift=shift,
+                )
 
             # Complete the application
             app.clock_out_time = now
             app.status = 'COMPLETED'
             app.save(update_fields=['status', 'clock_out_time', 'updated_at'])
+            record_professional_stats(app.professional, completed=1)
 
             bonus_note = f" (includes 20% early-end bonus)" if bonus > 0 else ""
             Notification.send(
@@ -525,14 +549,16 @@ class FacilityEndShiftEarlyService(BaseService):
             cost = shift.rate * Decimal(str(scheduled_hours))
             compensation = cost * Decimal('0.40')
 
-            app.professional.wallet_balance += compensation
-            app.professional.save(update_fields=['wallet_balance'])
+            payout = DuePayout.record_paid(app, 'COMPENSATION', compensation)
+            if payout:
+                app.professional.wallet_balance += compensation
+                app.professional.save(update_fields=['wallet_balance'])
 
-            Transaction.objects.create(
-                user=app.professional.user, amount=compensation,
-                transaction_type='PAYOUT', reference=str(uuid.uuid4()),
-                status='SUCCESS', shift=shift,
-            )
+                Transaction.objects.create(
+                    user=app.professional.user, amount=compensation,
+                    transaction_type='PAYOUT', reference=payout.reference,
+                    status='SUCCESS', shift=shift,
+                )
 
             app.status = 'CANCELLED'
             app.cancelled_by = 'FACILITY'
@@ -553,7 +579,7 @@ class FacilityEndShiftEarlyService(BaseService):
         # Reject remaining PENDING
         ShiftApplication.objects.filter(
             shift=shift, status='PENDING'
-        ).update(status='REJECTED')
+        ).update(status='REJECTED', updated_at=timezone.now())
 
         # Calculate facility refund (unused portion)
         total_original_cost = shift.rate * Decimal(str(scheduled_hours)) * shift.quantity_needed
@@ -576,6 +602,7 @@ class FacilityEndShiftEarlyService(BaseService):
 
         shift.status = 'COMPLETED'
         shift.save(update_fields=['status', 'updated_at'])
+        invalidate_open_shift_feed(shift)
 
         return {
             "status": "success",
@@ -0,0 +1,177 @@
+"""
+Shared cache of the open-shift set (OPEN/FILLED shifts) behind the
+professional feeds.
+
+Entries hold Shift rows for one specialty filter and one region, or
+nationwide. Every entry key includes the version tokens of the scopes the
+entry depends on: its region cell for regional entries, otherwise its
+specialty names, or "all" for the unfiltered nationwide list. Changing a
+shift replaces the tokens of its own scopes, so only entries that could
+contain it stop being reachable. Nothing is deleted.
+OPEN_SHIFT_FEED_CACHE_TIMEOUT only bounds how long an orphaned entry lingers.
+
+Facilities are not cached: with_facilities() loads them fresh for the page
+being rendered, so facility edits show up immediately.
+
+Services call invalidate_open_shift_feed() whenever they create a shift or
+change its status or fill count.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from accounts.models import Facility, Specialty
+from accounts.selectors import SpecialtySelector
+from core.services import BaseSelector
+from core.utils import grid_cell, grid_cells_within, haversine_many
+from .models import Shift, ShiftApplication
+from .selectors import ShiftSelector
+
+OPEN_STATUSES = ('OPEN', 'FILLED')
+
+# Region cells for the cache. At 1° (~111 km), a 50 km radius reads up to 4 entries.
+REGION_DEGREES = 1.0
+
+ALL_SCOPE = 'all'
+
+
+def _version_key(scope):
+    return f"open-shifts:version:{scope}"
+
+
+def shift_scopes(specialty, latitude, longitude):
+    """Cache scopes a shift with these attributes can appear in."""
+    scopes = {ALL_SCOPE, f"specialty:{Specialty.normalize(specialty or '')}"}
+    region = grid_cell(latitude, longitude, REGION_DEGREES)
+    if region:
+        scopes.add(f"region:{region}")
+    return scopes
+
+
+def invalidate_scopes(scopes):
+    """Retire every cached entry depending on any of the scopes, once the transaction commits."""
+    versions = {_version_key(scope): uuid.uuid4().hex for scope in scopes}
+    if versions:
+        transaction.on_commit(lambda: cache.set_many(versions, timeout=None))
+
+
+def invalidate_open_shift_feed(*shifts):
+    """Retire the cached feed entries the given shifts can appear in."""
+    invalidate_scopes(set().union(*(
+        shift_scopes(s.specialty, s.latitude, s.longitude) for s in shifts
+    )))
+
+
+def invalidate_facility(facility):
+    """
+    Facility names are rendered into the feeds but not cached, so only the
+    feed version needs to move for clients holding an ETag.
+    """
+    invalidate_scopes({ALL_SCOPE})
+
+
+class OpenShiftFeed(BaseSelector):
+    """Reads the open-shift set from the cache, filling missing entries from the database."""
+
+    def shifts(self, specialty=None):
+        """Open shifts nationwide, newest first."""
+        names = self._specialty_names(specialty)
+        return self._entries(names, [None])[None]
+
+    def shifts_near(self, lat, lng, radius_km, specialty=None):
+        """
+        (shifts, distances) for open shifts within radius_km of (lat, lng).
+        distances maps shift id -> km. The region entries covering the
+        bounding box are read in one round trip, then exact distances are
+        computed in one vectorized call.
+        """
+        names = self._specialty_names(specialty)
+        entries = self._entries(names, grid_cells_within(lat, lng, radius_km, REGION_DEGREES))
+        candidates = [s for rows in entries.values() for s in rows]
+        if not candidates:
+            return [], {}
+        km = haversine_many(
+            lat, lng,
+            [s.latitude for s in candidates],
+            [s.longitude for s in candidates],
+        )
+        nearby = [(s, float(d)) for s, d in zip(candidates, km) if d <= radius_km]
+        return [s for s, _ in nearby], {s.id: round(d, 1) for s, d in nearby}
+
+    def version(self):
+        """Token that changes whenever any open shift changes (for ETags)."""
+        return self._versions({ALL_SCOPE})[ALL_SCOPE]
+
+    def with_facilities(self, shifts):
+        """Attach current facilities to a page of cached shifts, in one query."""
+        facilities = Facility.objects.in_bulk({s.facility_id for s in shifts})
+        for shift in shifts:
+            shift.facility = facilities[shift.facility_id]
+        return shifts
+
+    def applied_shift_ids(self, professional):
+        """The professional's own exclusions, applied on top of the shared set."""
+        return set(
+            ShiftApplication.objects.filter(professional=professional).values_list('shift_id', flat=True)
+        )
+
+    def open_shifts(self, names=None, region=None):
+        """Queryset behind one cache entry."""
+        qs = Shift.objects.filter(status__in=OPEN_STATUSES)
+        if names is not None:
+            qs = ShiftSelector().filter_specialty_names(qs, names)
+        if region:
+            row, col = (int(part) for part in region.split(':'))
+            qs = qs.filter(
+                latitude__gte=row * REGION_DEGREES, latitude__lt=(row + 1) * REGION_DEGREES,
+                longitude__gte=col * REGION_DEGREES, longitude__lt=(col + 1) * REGION_DEGREES,
+            )
+        return qs.order_by('-created_at', '-id')
+
+    # -- cache entries --------------------------------------------------------
+
+    def _specialty_names(self, specialty):
+        if not specialty:
+            return None
+        return sorted(SpecialtySelector().matching_names(specialty))
+
+    def _entries(self, names, regions):
+        """Map region -> cached rows for the specialty filter, filling misses."""
+        base_scopes = [f"specialty:{n}" for n in names] if names is not None else [ALL_SCOPE]
+        # A region cell is small enough that any change inside it retires all
+        # of its entries; only nationwide entries depend on specialty or "all"
+        entry_scopes = {region: [f"region:{region}"] if region else base_scopes for region in regions}
+        versions = self._versions(set().union(*entry_scopes.values()))
+
+        keys = {}
+        filter_part = ','.join(names) if names is not None else '*'
+        for region in regions:
+            stamp = hashlib.md5(
+                '|'.join([filter_part] + [f"{s}={versions[s]}" for s in entry_scopes[region]]).encode(),
+                usedforsecurity=False,
+            ).hexdigest()
+            keys[f"open-shifts:{region or '*'}:{stamp}"] = region
+
+        found = cache.get_many(list(keys))
+        missing = {}
+        for key, region in keys.items():
+            if key not in found:
+                missing[key] = found[key] = self._load(names, region)
+        if missing:
+            cache.set_many(missing, timeout=settings.OPEN_SHIFT_FEED_CACHE_TIMEOUT)
+        return {region: found[key] for key, region in keys.items()}
+
+    def _versions(self, scopes):
+        keys = {_version_key(scope): scope for scope in scopes}
+        found = cache.get_many(list(keys))
+        for key in keys.keys() - found.keys():
+            # add() so a concurrent invalidation is not overwritten
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            found[key] = cache.get(key) or ''
+        return {scope: found[key] for key, scope in keys.items()}
+
+    def _load(self, names, region):
+        return list(self.open_shifts(names, region))
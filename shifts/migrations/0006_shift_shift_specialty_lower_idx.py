@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:45
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_specialty_professional_specialty_set_specialtyalias"),
+        ("shifts", "0005_shiftapplication_cancellation_reason_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(django.db.models.functions.text.Lower("specialty"), name="shift_specialty_lower_idx"),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:54
+
+import django.db.models.deletion
+import uuid
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def schedule_open_shifts(apps, schema_editor):
+    Shift = apps.get_model("shifts", "Shift")
+    ShiftExpiry = apps.get_model("shifts", "ShiftExpiry")
+    shifts = Shift.objects.filter(status__in=["OPEN", "FILLED"]).only("id", "end_time")
+
+    batch = []
+    for shift in shifts.iterator(chunk_size=2000):
+        # Same rounding as ShiftExpiry.bucket_for
+        bucket = shift.end_time.replace(second=0, microsecond=0)
+        if bucket < shift.end_time:
+            bucket += timedelta(minutes=1)
+        batch.append(ShiftExpiry(shift_id=shift.id, bucket=bucket))
+        if len(batch) >= 2000:
+            ShiftExpiry.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ShiftExpiry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shifts", "0006_shift_shift_specialty_lower_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShiftExpiry",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("bucket", models.DateTimeField(db_index=True)),
+                ("shift", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name="expiry", to="shifts.shift")),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.RunPython(schedule_open_shifts, migrations.RunPython.noop),
+    ]
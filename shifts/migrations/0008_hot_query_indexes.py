@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0007_professional_professional_score"),
+        ("shifts", "0007_shiftexpiry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(condition=models.Q(("status__in", ["OPEN", "FILLED"])), fields=["-created_at"], name="shift_active_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(condition=models.Q(("status__in", ["OPEN", "FILLED"])), fields=["end_time"], name="shift_active_end_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(fields=["facility", "status", "-created_at"], name="shift_fac_status_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(fields=["facility", "-created_at"], name="shift_fac_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shiftapplication",
+            index=models.Index(fields=["professional", "status"], name="app_pro_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shiftapplication",
+            index=models.Index(fields=["shift", "status"], name="app_shift_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="shiftapplication",
+            index=models.Index(condition=models.Q(("clock_out_time__isnull", True), ("status", "IN_PROGRESS")), fields=["shift"], name="app_stuck_clock_out_idx"),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:58
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+BOOKED_STATUSES = ["CONFIRMED", "IN_PROGRESS", "ATTENDANCE_PENDING"]
+
+
+def check_no_overlapping_bookings(apps, schema_editor):
+    # Clashes used to be checked in Python only, so racing confirmations may
+    # have double-booked a professional. The exclusion constraint cannot be
+    # added over such rows; list them so they can be resolved by hand first.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT a.professional_id, a.id, a.status, lower(a.time_range), upper(a.time_range),
+                   b.id, b.status, lower(b.time_range), upper(b.time_range)
+            FROM shifts_shiftapplication AS a
+            JOIN shifts_shiftapplication AS b
+              ON b.professional_id = a.professional_id
+             AND a.id < b.id
+             AND a.time_range && b.time_range
+            WHERE a.status = ANY(%s) AND b.status = ANY(%s)
+            ORDER BY a.professional_id, lower(a.time_range)
+            """,
+            [BOOKED_STATUSES, BOOKED_STATUSES],
+        )
+        clashes = cursor.fetchall()
+    if not clashes:
+        return
+
+    lines = [
+        f"  professional {pro}: application {a_id} ({a_status}, {a_start} - {a_end})"
+        f" overlaps {b_id} ({b_status}, {b_start} - {b_end})"
+        for pro, a_id, a_status, a_start, a_end, b_id, b_status, b_start, b_end in clashes
+    ]
+    raise RuntimeError(
+        f"Cannot add app_no_overlapping_bookings: {len(clashes)} pair(s) of bookings overlap "
+        f"for the same professional. Cancel or reschedule one application in each pair, "
+        f"then run migrate again.\n" + "\n".join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0007_professional_professional_score"),
+        ("shifts", "0008_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shiftapplication",
+            name="time_range",
+            field=django.contrib.postgres.fields.ranges.DateTimeRangeField(blank=True, null=True),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE shifts_shiftapplication AS app
+            SET time_range = tstzrange(shift.start_time, shift.end_time)
+            FROM shifts_shift AS shift
+            WHERE shift.id = app.shift_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="shiftapplication",
+            index=django.contrib.postgres.indexes.GistIndex(fields=["time_range"], name="app_time_range_gist_idx"),
+        ),
+        BtreeGistExtension(),
+        migrations.RunPython(check_no_overlapping_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="shiftapplication",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(("status__in", ["CONFIRMED", "IN_PROGRESS", "ATTENDANCE_PENDING"])), expressions=[("professional", "="), ("time_range", "&&")], name="app_no_overlapping_bookings"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_professional_rating_sum"),
+        ("shifts", "0009_shiftapplication_time_range"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(condition=models.Q(("status__in", ["OPEN", "FILLED"])), fields=["latitude", "longitude"], name="shift_active_location_idx"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_professional_rating_sum"),
+        ("shifts", "0010_shift_active_location_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(fields=["facility", "start_time"], name="shift_fac_start_idx"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:57
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_professional_rating_sum"),
+        ("shifts", "0011_shift_fac_start_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="shift",
+            name="shift_specialty_lower_idx",
+        ),
+        migrations.AddIndex(
+            model_name="shift",
+            index=models.Index(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim(models.Func(models.F("specialty"), models.Value("\\s+"), models.Value(" "), models.Value("g"), function="REGEXP_REPLACE", output_field=models.CharField()))), name="shift_specialty_norm_idx"),
+        ),
+    ]
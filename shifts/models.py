@@ -1,10 +1,29 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import F, Func, Value
+from django.db.models.functions import Lower, Trim
 from django.utils.translation import gettext_lazy as _
 from accounts.models import Facility, Professional
 from core.models import BaseModel
 import uuid
 import random
 import string
+from datetime import timedelta
+
+def normalized_specialty(field='specialty'):
+    """
+    SQL twin of accounts.models.Specialty.normalize: collapse whitespace,
+    trim and lowercase, so "ICU  Nurse" and " icu nurse" compare equal.
+    """
+    collapsed = Func(
+        F(field), Value(r'\s+'), Value(' '), Value('g'),
+        function='REGEXP_REPLACE', output_field=models.CharField(),
+    )
+    return Lower(Trim(collapsed))
+
 
 class Shift(BaseModel):
     STATUS_CHOICES = (
@@ -32,10 +51,62 @@ class Shift(BaseModel):
     longitude = models.FloatField(null=True, blank=True)
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='OPEN')
+
+    class Meta:
+        indexes = [
+            # Normalized specialty filtering (see ShiftSelector.filter_specialty_names)
+            models.Index(normalized_specialty(), name='shift_specialty_norm_idx'),
+            # Open-shift feeds, newest first (shifts.feed_cache)
+            models.Index(
+                fields=['-created_at'], name='shift_active_created_idx',
+                condition=models.Q(status__in=['OPEN', 'FILLED']),
+            ),
+            # Region entries of the cached open-shift feed (shifts.feed_cache)
+            models.Index(
+                fields=['latitude', 'longitude'], name='shift_active_location_idx',
+                condition=models.Q(status__in=['OPEN', 'FILLED']),
+            ),
+            # Expiry sweep (shifts.tasks.close_expired_shifts)
+            models.Index(
+                fields=['end_time'], name='shift_active_end_idx',
+                condition=models.Q(status__in=['OPEN', 'FILLED']),
+            ),
+            # Facility dashboards (ShiftSelector.list_facility_shifts)
+            models.Index(fields=['facility', 'status', '-created_at'], name='shift_fac_status_created_idx'),
+            models.Index(fields=['facility', '-created_at'], name='shift_fac_created_idx'),
+            # Facility calendar date ranges (ShiftSelector.list_calendar_shifts)
+            models.Index(fields=['facility', 'start_time'], name='shift_fac_start_idx'),
+        ]
     
     def __str__(self):
         return f"{self.role} at {self.facility.name}"
 
+class ShiftExpiry(BaseModel):
+    """
+    Minute bucket in which a shift ends. The expire_due_shifts sweeper only
+    looks at buckets that are due instead of scanning the Shift table.
+    """
+    shift = models.OneToOneField(Shift, on_delete=models.CASCADE, related_name='expiry')
+    bucket = models.DateTimeField(db_index=True)
+
+    @staticmethod
+    def bucket_for(end_time):
+        """Round end_time up to the next whole minute."""
+        bucket = end_time.replace(second=0, microsecond=0)
+        if bucket < end_time:
+            bucket += timedelta(minutes=1)
+        return bucket
+
+    @classmethod
+    def schedule(cls, shift):
+        """Create or move the expiry timer for a shift."""
+        return cls.objects.update_or_create(
+            shift=shift, defaults={'bucket': cls.bucket_for(shift.end_time)},
+        )[0]
+
+    def __str__(self):
+        return f"Expiry for {self.shift_id} at {self.bucket}"
+
 class SavedAddress(BaseModel):
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE, related_name='saved_addresses')
     name = models.CharField(max_length=255) # e.g., "Main Branch", "Annex"
@@ -56,6 +127,10 @@ class ShiftApplication(BaseModel):
         ('COMPLETED', 'Completed'), # Clocked Out
         ('CANCELLED', 'Cancelled'),
     )
+    # Statuses that book the professional's time; these may not overlap
+    ACTIVE_STATUSES = ('CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING')
+    # Active or worked: the professionals shown on the facility calendar
+    BOOKED_STATUSES = ACTIVE_STATUSES + ('COMPLETED',)
     
     shift = models.ForeignKey(Shift, on_delete=models.CASCADE, related_name='applications')
     professional = models.ForeignKey(Professional, on_delete=models.CASCADE, related_name='applications')
@@ -72,12 +147,45 @@ class ShiftApplication(BaseModel):
     cancellation_reason = models.TextField(blank=True, default='')
     cancelled_by = models.CharField(max_length=20, blank=True, default='')  # 'PROFESSIONAL', 'FACILITY', 'SYSTEM'
 
+    # Copy of the shift's [start_time, end_time) so clash checks are a GiST probe
+    # instead of a join through Shift. Kept in sync by ShiftUpdateService.
+    time_range = DateTimeRangeField(null=True, blank=True)
+
     class Meta:
         unique_together = ('shift', 'professional')
+        indexes = [
+            # Clash checks and professional shift lists
+            models.Index(fields=['professional', 'status'], name='app_pro_status_idx'),
+            # Pending counts and bulk rejections per shift
+            models.Index(fields=['shift', 'status'], name='app_shift_status_idx'),
+            # Forgotten clock-out sweep (shifts.tasks.close_expired_shifts)
+            models.Index(
+                fields=['shift'], name='app_stuck_clock_out_idx',
+                condition=models.Q(status='IN_PROGRESS', clock_out_time__isnull=True),
+            ),
+            GistIndex(fields=['time_range'], name='app_time_range_gist_idx'),
+        ]
+        constraints = [
+            # The database refuses to double-book a professional, even under
+            # concurrent confirmations (needs the btree_gist extension)
+            ExclusionConstraint(
+                name='app_no_overlapping_bookings',
+                expressions=[
+                    ('professional', RangeOperators.EQUAL),
+                    ('time_range', RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(status__in=['CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING']),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.professional} applied for {self.shift}"
 
+    def save(self, *args, **kwargs):
+        if self.time_range is None and self.shift_id:
+            self.time_range = DateTimeTZRange(self.shift.start_time, self.shift.end_time)
+        super().save(*args, **kwargs)
+
     @staticmethod
     def generate_code():
         """Generate a random 6-digit numeric code."""
@@ -4,12 +4,17 @@ Rating & Review Service
 Handles:
   - Facility submitting a rating for a professional after a completed shift
   - Auto-generated ratings from cancellation penalties
-  - Refreshing a professional's cached score fields
+  - Incrementally updating a professional's cached stats and professional_score
+  - Reconciling those cached stats against the source rows
 """
 
-from django.db import transaction, models
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from core.services import BaseService
-from accounts.models import Review
+from accounts.models import Professional, Review
 from .models import ShiftApplication
 
 
@@ -48,8 +53,7 @@ class RatingService(BaseService):
             is_auto=False,
         )
 
-        # Refresh the professional's cached stats
-        refresh_professional_stats(application.professional)
+        record_professional_stats(application.professional, rating=rating)
 
         return review
 
@@ -70,40 +74,99 @@ class RatingService(BaseService):
             is_auto=True,
         )
 
-        refresh_professional_stats(application.professional)
+        record_professional_stats(application.professional, rating=rating)
         return review
 
 
-def refresh_professional_stats(professional):
+STATS_FIELDS = ['rating_sum', 'total_ratings', 'total_completed_shifts', 'total_cancelled_shifts']
+
+
+def record_professional_stats(professional, rating=None, completed=0, cancelled=0):
     """
-    Recompute and save the professional's cached rating fields from
-    all Reviews targeting them and all their ShiftApplications.
+    Apply O(1) deltas to the professional's cached stats: a new rating and/or
+    completed/cancelled shift counts. The counters are bumped with F()
+    expressions; avg_rating and professional_score are then derived from the
+    updated row while the UPDATE still holds its row lock.
     """
-    from django.db.models import Avg, Count
-
-    stats = Review.objects.filter(
-        target_user=professional.user
-    ).aggregate(
-        avg=Avg('rating'),
-        count=Count('id'),
+    updates = {}
+    if rating is not None:
+        updates['rating_sum'] = F('rating_sum') + rating
+        updates['total_ratings'] = F('total_ratings') + 1
+    if completed:
+        updates['total_completed_shifts'] = F('total_completed_shifts') + completed
+    if cancelled:
+        updates['total_cancelled_shifts'] = F('total_cancelled_shifts') + cancelled
+    if not updates:
+        return
+
+    with transaction.atomic():
+        Professional.objects.filter(pk=professional.pk).update(**updates)
+        professional.refresh_from_db(fields=STATS_FIELDS)
+        _set_derived_stats(professional)
+        professional.save(update_fields=['avg_rating', 'professional_score', 'updated_at'])
+
+
+def _set_derived_stats(professional):
+    if professional.total_ratings:
+        professional.avg_rating = (
+            Decimal(professional.rating_sum) / professional.total_ratings
+        ).quantize(Decimal('0.01'))
+    else:
+        professional.avg_rating = Decimal('0.00')
+    professional.professional_score = professional.compute_professional_score()
+
+
+def reconcile_professional_stats(batch_size=500):
+    """
+    Recompute every professional's stats from Reviews and ShiftApplications
+    in bulk and fix the rows whose incremental counters have drifted.
+    Returns the number of professionals corrected.
+    """
+    reviews = (
+        Review.objects.filter(target_user=OuterRef('user_id'))
+        .order_by().values('target_user')
     )
+    apps = ShiftApplication.objects.filter(professional=OuterRef('pk')).order_by().values('professional')
+
+    def with_actual_stats(qs):
+        return qs.annotate(
+            actual_rating_sum=Coalesce(Subquery(reviews.annotate(v=Sum('rating')).values('v')), 0),
+            actual_ratings=Coalesce(Subquery(reviews.annotate(v=Count('id')).values('v')), 0),
+            actual_completed=Coalesce(Subquery(
+                apps.filter(status='COMPLETED').annotate(v=Count('id')).values('v')
+            ), 0),
+            actual_cancelled=Coalesce(Subquery(
+                apps.filter(status='CANCELLED', cancelled_by='PROFESSIONAL')
+                .annotate(v=Count('id')).values('v')
+            ), 0),
+        )
 
-    professional.avg_rating = stats['avg'] or 0
-    professional.total_ratings = stats['count'] or 0
-
-    # Count completed and cancelled applications
-    app_stats = ShiftApplication.objects.filter(
-        professional=professional
-    ).aggregate(
-        completed=Count('id', filter=models.Q(status='COMPLETED')),
-        cancelled=Count('id', filter=models.Q(status='CANCELLED', cancelled_by='PROFESSIONAL')),
+    drifted_ids = list(
+        with_actual_stats(Professional.objects.all())
+        .exclude(
+            rating_sum=F('actual_rating_sum'),
+            total_ratings=F('actual_ratings'),
+            total_completed_shifts=F('actual_completed'),
+            total_cancelled_shifts=F('actual_cancelled'),
+        )
+        .values_list('id', flat=True)
     )
 
-    professional.total_completed_shifts = app_stats['completed'] or 0
-    professional.total_cancelled_shifts = app_stats['cancelled'] or 0
-
-    professional.save(update_fields=[
-        'avg_rating', 'total_ratings',
-        'total_completed_shifts', 'total_cancelled_shifts',
-        'updated_at',
-    ])
+    for start in range(0, len(drifted_ids), batch_size):
+        with transaction.atomic():
+            # Lock the batch so concurrent deltas are not overwritten mid-fix
+            batch = list(with_actual_stats(
+                Professional.objects.select_for_update(of=('self',))
+                .filter(id__in=drifted_ids[start:start + batch_size])
+            ))
+            for pro in batch:
+                pro.rating_sum = pro.actual_rating_sum
+                pro.total_ratings = pro.actual_ratings
+                pro.total_completed_shifts = pro.actual_completed
+                pro.total_cancelled_shifts = pro.actual_cancelled
+                _set_derived_stats(pro)
+            Professional.objects.bulk_update(
+                batch, STATS_FIELDS + ['avg_rating', 'professional_score'],
+            )
+
+    return len(drifted_ids)
@@ -1,72 +1,138 @@
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch
+from accounts.selectors import SpecialtySelector
 from core.services import BaseSelector
-from .models import Shift, ShiftApplication
+from core.utils import haversine_many
+from .models import Shift, ShiftApplication, normalized_specialty
 
 class ShiftSelector(BaseSelector):
-    def list_open_shifts(self, specialty=None, exclude_professional=None):
-        qs = Shift.objects.filter(status__in=['OPEN', 'FILLED'])
-        if specialty:
-            qs = qs.filter(specialty=specialty)
-        if exclude_professional:
-            applied_shift_ids = ShiftApplication.objects.filter(
-                professional=exclude_professional
-            ).values_list('shift_id', flat=True)
-            qs = qs.exclude(id__in=applied_shift_ids)
-        return qs.order_by('-created_at')
-
-    def list_facility_shifts(self, facility, status=None):
+    def list_facility_shifts(self, facility, status=None, specialty=None):
         qs = Shift.objects.filter(facility=facility)
         if status:
             qs = qs.filter(status=status.upper())
+        if specialty:
+            qs = self._filter_specialty(qs, specialty)
         return qs.order_by('-created_at')
 
-    def list_professional_shifts(self, professional):
-        # Exclude shifts the professional already applied to
-        applied_shift_ids = ShiftApplication.objects.filter(
-            professional=professional
-        ).values_list('shift_id', flat=True)
-        qs = (
-            Shift.objects.filter(status__in=['OPEN', 'FILLED'])
-            .exclude(id__in=applied_shift_ids)
-            .select_related('facility')
+    def _filter_specialty(self, qs, specialty):
+        # Match on any name or alias of the specialties the term resolves to
+        return self.filter_specialty_names(qs, SpecialtySelector().matching_names(specialty))
+
+    def filter_specialty_names(self, qs, names):
+        return qs.alias(specialty_normalized=normalized_specialty()).filter(specialty_normalized__in=names)
+
+    def shift_distances(self, shifts, lat, lng):
+        """
+        Map shift id -> distance in km from (lat, lng), computed in one
+        vectorized call. Shifts without coordinates are left out.
+        """
+        if lat is None or lng is None:
+            return {}
+        located = [s for s in shifts if s.latitude is not None and s.longitude is not None]
+        if not located:
+            return {}
+        distances = haversine_many(
+            lat, lng,
+            [s.latitude for s in located],
+            [s.longitude for s in located],
+        )
+        return {s.id: round(float(d), 1) for s, d in zip(located, distances)}
+
+    def clashing_applications(self, professional_ids, start_time, end_time, statuses=ShiftApplication.ACTIVE_STATUSES):
+        """
+        Applications of the given professionals, in the given statuses (active
+        bookings by default), that overlap [start_time, end_time). This is the
+        one place overlap is defined; it probes the time_range GiST index.
+        """
+        return ShiftApplication.objects.filter(
+            professional_id__in=professional_ids,
+            status__in=statuses,
+            time_range__overlap=DateTimeTZRange(start_time, end_time),
+        )
+
+    def clashing_professional_ids(self, professional_ids, start_time, end_time):
+        """
+        Return the set of IDs, out of professional_ids, of professionals who
+        already have an active application overlapping [start_time, end_time).
+        Runs as a single query regardless of how many IDs are passed.
+        """
+        return set(
+            self.clashing_applications(professional_ids, start_time, end_time)
+            .values_list('professional_id', flat=True).distinct()
         )
-        return qs.order_by('-created_at')
 
     def get_shift(self, shift_id):
         return Shift.objects.get(id=shift_id)
         
-    def list_applications(self, shift_id, user):
+    def list_applications(self, shift_id, user, sort=None):
         shift = Shift.objects.get(id=shift_id)
         if shift.facility.user != user:
             raise PermissionError("Not your shift.")
-        return (
+        qs = (
             ShiftApplication.objects
             .filter(shift=shift)
             .select_related('professional__user', 'review')
-            .order_by('-created_at')
         )
+        if sort == 'score':
+            return qs.order_by('-professional__professional_score', '-created_at')
+        return qs.order_by('-created_at')
+
+    def applications_version(self, professional):
+        """
+        Cheap stamp of a professional's applications and their shifts: one
+        aggregate over the professional's rows. Any insert, delete or save
+        (bulk updates set updated_at too) changes it.
+        """
+        return tuple(
+            ShiftApplication.objects.filter(professional=professional).aggregate(
+                count=Count('id'), app=Max('updated_at'), shift=Max('shift__updated_at'),
+            ).values()
+        )
+
+    def list_calendar_shifts(self, facility, start, end, applicant_id=None):
+        """
+        Facility shifts starting in the half-open range [start, end), with
+        their booked applications prefetched as booked_applications. Plain
+        datetime bounds keep the range on shift_fac_start_idx, and the
+        applicant filter is an EXISTS, so there is no join to de-duplicate.
+        Two queries in total.
+        """
+        qs = Shift.objects.filter(facility=facility, start_time__gte=start, start_time__lt=end)
 
-    def list_calendar_shifts(self, facility, date_start, date_end, applicant_id=None):
-        qs = Shift.objects.filter(facility=facility)
-        
-        # Filter by date range
-        if date_start:
-            qs = qs.filter(start_time__date__gte=date_start)
-        if date_end:
-            qs = qs.filter(start_time__date__lte=date_end)
-            
         if applicant_id:
-            # Filter shifts where specific applicant has applied and is confirmed
-            qs = qs.filter(
-                applications__professional__id=applicant_id, 
-                applications__status__in=['CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING', 'COMPLETED']
-            )
-            
-        return qs.distinct()
+            # Only shifts the applicant is booked on
+            qs = qs.filter(Exists(ShiftApplication.objects.filter(
+                shift=OuterRef('pk'),
+                professional_id=applicant_id,
+                status__in=ShiftApplication.BOOKED_STATUSES,
+            )))
+
+        return qs.prefetch_related(Prefetch(
+            'applications',
+            queryset=ShiftApplication.objects.filter(
+                status__in=ShiftApplication.BOOKED_STATUSES,
+            ).select_related('professional__user'),
+            to_attr='booked_applications',
+        )).order_by('start_time', 'id')
 
-    def list_facility_pending_applications(self, facility):
-        return (
+    def list_facility_pending_applications(self, facility, exclude_clashing=False):
+        """
+        Pending applications across the facility's shifts, each annotated with
+        has_clash: whether the applicant already has an active booking that
+        overlaps the shift. The check is one correlated EXISTS on the
+        time_range GiST index, so it adds no per-row queries.
+        """
+        clashing = ShiftApplication.objects.filter(
+            professional_id=OuterRef('professional_id'),
+            status__in=ShiftApplication.ACTIVE_STATUSES,
+            time_range__overlap=OuterRef('time_range'),
+        )
+        qs = (
             ShiftApplication.objects
             .filter(shift__facility=facility, status='PENDING')
+            .annotate(has_clash=Exists(clashing))
             .select_related('shift', 'professional__user')
-            .order_by('-created_at')
         )
+        if exclude_clashing:
+            qs = qs.filter(has_clash=False)
+        return qs.order_by('-created_at')
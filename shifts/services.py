@@ -1,9 +1,13 @@
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from core.services import BaseService
 from core.geocoding import geocoding_service
-from .models import Shift, ShiftApplication
+from .models import Shift, ShiftApplication, ShiftExpiry
+from .selectors import ShiftSelector
+from .feed_cache import invalidate_open_shift_feed
+from .rating_service import record_professional_stats
 from .tasks import notify_matching_professionals
 from decimal import Decimal
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
 
 class ShiftCreateService(BaseService):
     @transaction.atomic
@@ -116,6 +120,10 @@ class ShiftCreateService(BaseService):
             shift=shift,
         )
 
+        # Expire the shift within a minute of its end time
+        ShiftExpiry.schedule(shift)
+        invalidate_open_shift_feed(shift)
+
         # Trigger notification task
         notify_matching_professionals.delay(shift.id)
 
@@ -220,6 +228,20 @@ class ShiftUpdateService(BaseService):
             facility.save(update_fields=['wallet_balance'])
 
         shift.save()
+        invalidate_open_shift_feed(shift)
+        ShiftExpiry.schedule(shift)
+
+        # Keep the applications' denormalized time range in step with the shift
+        if shift.start_time != old_start or shift.end_time != old_end:
+            try:
+                with transaction.atomic():
+                    ShiftApplication.objects.filter(shift=shift).update(
+                        time_range=DateTimeTZRange(shift.start_time, shift.end_time),
+                    )
+            except IntegrityError:
+                raise ValueError(
+                    "The new times clash with another shift a confirmed professional is booked on."
+                )
         return shift
 
 
@@ -243,11 +265,8 @@ class ShiftApplyService(BaseService):
             raise ValueError("Already applied.")
 
         # Clash Prevention: block if already CONFIRMED/IN_PROGRESS at same time
-        clashing_apps = ShiftApplication.objects.filter(
-            professional=user.professional,
-            status__in=['CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING'],
-            shift__start_time__lt=shift.end_time,
-            shift__end_time__gt=shift.start_time
+        clashing_apps = ShiftSelector().clashing_applications(
+            [user.professional.id], shift.start_time, shift.end_time,
         )
 
         if clashing_apps.exists():
@@ -285,59 +304,67 @@ class ShiftManageApplicationService(BaseService):
 
             # Clash check: ensure this professional doesn't already have a
             # CONFIRMED/IN_PROGRESS shift that overlaps with this one
-            clashing_confirmed = ShiftApplication.objects.filter(
-                professional=application.professional,
-                status__in=['CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING'],
-                shift__start_time__lt=shift.end_time,
-                shift__end_time__gt=shift.start_time
+            clash_message = (
+                "This professional already has a confirmed shift at this time. "
+                "Their application will be removed automatically."
+            )
+            clashing_confirmed = ShiftSelector().clashing_applications(
+                [application.professional_id], shift.start_time, shift.end_time,
             ).exclude(id=application.id)
 
             if clashing_confirmed.exists():
-                raise ValueError(
-                    "This professional already has a confirmed shift at this time. "
-                    "Their application will be removed automatically."
-                )
+                raise ValueError(clash_message)
 
             application.status = 'CONFIRMED'
             application.check_in_code = ShiftApplication.generate_code()
             application.check_out_code = ShiftApplication.generate_code()
-            application.save()
+            try:
+                application.save()
+            except IntegrityError:
+                # A concurrent confirmation won the race (app_no_overlapping_bookings)
+                raise ValueError(clash_message)
 
             # Update shift filled count
             shift.quantity_filled += 1
             if shift.quantity_filled >= shift.quantity_needed:
                 shift.status = 'FILLED'
             shift.save()
+            invalidate_open_shift_feed(shift)
 
             # --- Auto-reject clashing PENDING applications at other shifts ---
-            clashing_pending = ShiftApplication.objects.filter(
-                professional=application.professional,
-                status='PENDING',
-                shift__start_time__lt=shift.end_time,
-                shift__end_time__gt=shift.start_time
+            clashing_pending = ShiftSelector().clashing_applications(
+                [application.professional_id], shift.start_time, shift.end_time,
+                statuses=['PENDING'],
             ).exclude(shift=shift).select_related('shift__facility__user')
+            clashing_pending = list(clashing_pending)
 
             from core.models import Notification
 
-            for clash_app in clashing_pending:
-                clash_app.status = 'REJECTED'
-                clash_app.save(update_fields=['status', 'updated_at'])
+            if clashing_pending:
+                ShiftApplication.objects.filter(
+                    id__in=[clash_app.id for clash_app in clashing_pending]
+                ).update(status='REJECTED', updated_at=timezone.now())
 
-                # Notify the affected facility
+                # Notify the affected facilities
                 pro_name = (
                     f"{application.professional.user.first_name} "
                     f"{application.professional.user.last_name}".strip()
                     or application.professional.user.email
                 )
-                Notification.send(
-                    user=clash_app.shift.facility.user,
+                Notification.send_many(
+                    recipients=[
+                        (clash_app.shift.facility.user, {
+                            'message': (
+                                f"{pro_name} has been confirmed for another shift at the same time "
+                                f"and is no longer available for '{clash_app.shift.role}'."
+                            ),
+                            'related_object_id': clash_app.id,
+                        })
+                        for clash_app in clashing_pending
+                    ],
                     title="Applicant No Longer Available",
-                    message=(
-                        f"{pro_name} has been confirmed for another shift at the same time "
-                        f"and is no longer available for '{clash_app.shift.role}'."
-                    ),
+                    message="",
                     notification_type="CANCELLED",
-                    related_object_id=clash_app.id,
                 )
 
             # Notify the professional about confirmation
@@ -430,10 +457,12 @@ class ClockOutService(BaseService):
         application.clock_out_time = timezone.now()
         application.status = 'COMPLETED'
         application.save()
+        record_professional_stats(application.professional, completed=1)
 
-        # Trigger Payment
-        from billing.tasks import payout_professional
-        payout_professional.apply_async((application.id,), countdown=24*3600)
+        # Queue Payment (released after 24h unless the facility releases it sooner)
+        from datetime import timedelta
+        from billing.models import DuePayout
+        DuePayout.schedule(application, delay=timedelta(hours=24))
 
         # Notify Facility
         from core.models import Notification
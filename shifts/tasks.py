@@ -1,80 +1,259 @@
+from collections import defaultdict
+from decimal import Decimal
+
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
 from django.utils import timezone
-from accounts.models import Professional
-from core.utils import haversine
+from accounts.models import Facility, Professional
+from accounts.selectors import SpecialtySelector
+from core.utils import cache_lock, haversine_many, grid_cells_within
 from core.models import Notification
-from .models import Shift, ShiftApplication
+from .models import Shift, ShiftApplication, ShiftExpiry
+from .selectors import ShiftSelector
+from .feed_cache import invalidate_scopes, shift_scopes
+
+MATCH_RADIUS_KM = 50
+
+CLOSE_EXPIRED_SHIFTS_LOCK = 'lock:close_expired_shifts'
+# Longer than any sane run, shorter than the hourly beat interval
+CLOSE_EXPIRED_SHIFTS_LOCK_TIMEOUT = 55 * 60
 
 
 @shared_task
-def notify_matching_professionals(shift_id):
+def notify_matching_professionals(shift_id, wave=0):
     """
-    Notify professionals about a new shift, prioritised by professional_score.
-    Higher-scored professionals receive the notification first.
+    Notify professionals about a new shift in waves, prioritised by
+    professional_score (see SHIFT_NOTIFICATION_WAVES).
+
+    Each wave alerts the next-best slice of matching professionals who have
+    not been notified yet, then schedules the following wave. Dispatch stops
+    once the shift is filled or has enough pending applications.
     """
     try:
         shift = Shift.objects.select_related('facility').get(id=shift_id)
     except Shift.DoesNotExist:
         return
 
+    waves = settings.SHIFT_NOTIFICATION_WAVES
+    if wave >= len(waves):
+        return
+
+    if shift.status != 'OPEN' or shift.quantity_filled >= shift.quantity_needed:
+        return f"Shift {shift.id} no longer needs professionals; stopping at wave {wave}."
+
+    open_slots = shift.quantity_needed - shift.quantity_filled
+    pending = ShiftApplication.objects.filter(shift=shift, status='PENDING').count()
+    if pending >= open_slots * settings.SHIFT_NOTIFICATION_PENDING_PER_SLOT:
+        return f"Shift {shift.id} has {pending} pending applications; stopping at wave {wave}."
+
     target_lat = shift.latitude or shift.facility.location_lat
     target_lng = shift.longitude or shift.facility.location_lng
 
     if not target_lat or not target_lng:
         return
 
-    # Match professionals whose specialties overlap with the shift specialty.
-    # Use icontains on the JSON array to support partial matches
-    # (e.g., shift specialty "ICU" matches professional specialty "ICU Nurse").
-    potential_candidates = Professional.objects.filter(
-        is_verified=True,
-        current_location_lat__isnull=False,
-        current_location_lng__isnull=False,
-    ).select_related('user')
-
-    # Filter by specialty match (any professional specialty contains the shift specialty, or vice versa)
-    shift_spec = shift.specialty.lower()
-    potential_candidates = [
-        p for p in potential_candidates
-        if any(shift_spec in s.lower() or s.lower() in shift_spec for s in (p.specialties or []))
+    # Match professionals whose specialties overlap with the shift specialty
+    # (e.g., shift specialty "ICU" matches professional specialty "ICU Nurse"),
+    # resolved in SQL through the normalized specialty table.
+    # Only fetch professionals in grid cells overlapping the search radius;
+    # the exact haversine check below trims the corners.
+    # Skip anyone already alerted by an earlier wave or who already applied.
+    already_notified = Notification.objects.filter(
+        user_id=OuterRef('user_id'),
+        notification_type='SHIFT_POSTED',
+        related_object_id=shift.id,
+    )
+    potential_candidates = list(
+        Professional.objects.filter(
+            is_verified=True,
+            id__in=SpecialtySelector().professional_ids(shift.specialty),
+            location_cell__in=grid_cells_within(target_lat, target_lng, MATCH_RADIUS_KM),
+            current_location_lat__isnull=False,
+            current_location_lng__isnull=False,
+        )
+        .exclude(Exists(already_notified))
+        .exclude(applications__shift=shift)
+        .select_related('user')
+        # Top-rated get alerted first; the filters below preserve this order
+        .order_by('-professional_score', 'created_at')
+    )
+
+    # Exact distance for the whole candidate set in one vectorized call
+    distances = haversine_many(
+        target_lat, target_lng,
+        [p.current_location_lat for p in potential_candidates],
+        [p.current_location_lng for p in potential_candidates],
+    )
+    nearby_pros = [
+        pro for pro, dist in zip(potential_candidates, distances)
+        if dist <= MATCH_RADIUS_KM
     ]
 
-    matching_pros = []
-    for pro in potential_candidates:
-        dist = haversine(
-            pro.current_location_lat, pro.current_location_lng,
-            target_lat, target_lng,
+    # Drop professionals already booked at this time (one query for the whole set)
+    busy_ids = ShiftSelector().clashing_professional_ids(
+        [pro.id for pro in nearby_pros], shift.start_time, shift.end_time,
+    )
+    matching_pros = [pro for pro in nearby_pros if pro.id not in busy_ids]
+
+    # A wave size of None means "everyone who is left"
+    wave_size = waves[wave]['size']
+    wave_pros = matching_pros if wave_size is None else matching_pros[:wave_size]
+
+    Notification.send_many(
+        recipients=[pro.user for pro in wave_pros],
+        title="New Shift Available",
+        message=(
+            f"A new {shift.role} ({shift.specialty}) shift is available at "
+            f"{shift.facility.name}. ₦{shift.rate:,}/hr."
+        ),
+        notification_type="SHIFT_POSTED",
+        related_object_id=shift.id,
+        data={"shift_id": str(shift.id)},
+    )
+
+    next_wave = wave + 1
+    if len(matching_pros) > len(wave_pros) and next_wave < len(waves):
+        notify_matching_professionals.apply_async(
+            (shift_id, next_wave), countdown=waves[next_wave]['delay'],
         )
-        if dist > 50:
-            continue
-
-        has_clash = ShiftApplication.objects.filter(
-            professional=pro,
-            status__in=['CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING'],
-            shift__start_time__lt=shift.end_time,
-            shift__end_time__gt=shift.start_time,
-        ).exists()
-        if has_clash:
-            continue
-
-        matching_pros.append(pro)
-
-    # Sort by professional_score descending — top-rated get alerted first
-    matching_pros.sort(key=lambda p: p.professional_score, reverse=True)
-
-    for pro in matching_pros:
-        Notification.send(
-            user=pro.user,
-            title="New Shift Available",
-            message=(
-                f"A new {shift.role} ({shift.specialty}) shift is available at "
-                f"{shift.facility.name}. ₦{shift.rate:,}/hr."
-            ),
-            notification_type="SHIFT_POSTED",
-            related_object_id=shift.id,
-            data={"shift_id": str(shift.id)},
+
+    return f"Wave {wave}: notified {len(wave_pros)} professionals about shift {shift.id}."
+
+
+def expire_shifts(shifts, now):
+    """
+    Mark one chunk of OPEN/FILLED shifts COMPLETED as a set: refund unfilled
+    spots per facility, log a REFUND transaction per shift and reject the
+    remaining PENDING applications. Rows locked by another worker are
+    skipped. Returns the ids of the expired shifts, in queryset order.
+    """
+    import uuid
+    from billing.models import Transaction
+
+    with transaction.atomic():
+        rows = list(
+            shifts.select_for_update(skip_locked=True, of=('self',)).values_list(
+                'id', 'facility_id', 'facility__user_id', 'rate',
+                'start_time', 'end_time', 'quantity_needed', 'quantity_filled',
+                'specialty', 'latitude', 'longitude',
+            )
+        )
+        if not rows:
+            return []
+        shift_ids = [row[0] for row in rows]
+
+        Shift.objects.filter(id__in=shift_ids).update(status='COMPLETED', updated_at=now)
+        invalidate_scopes(set().union(*(shift_scopes(*row[8:]) for row in rows)))
+
+        # Refund for unfilled spots, summed per facility so each wallet is written once
+        facility_refunds = defaultdict(Decimal)
+        refund_transactions = []
+        for shift_id, facility_id, user_id, rate, start, end, needed, filled, *_ in rows:
+            unfilled = needed - filled
+            if unfilled <= 0:
+                continue
+            duration_hours = (end - start).total_seconds() / 3600
+            refund = rate * Decimal(str(duration_hours)) * unfilled
+            facility_refunds[facility_id] += refund
+            refund_transactions.append(Transaction(
+                user_id=user_id, amount=refund,
+                transaction_type='REFUND', reference=str(uuid.uuid4()),
+                status='SUCCESS', shift_id=shift_id,
+            ))
+
+        for facility_id, refund in facility_refunds.items():
+            Facility.objects.filter(id=facility_id).update(
+                wallet_balance=F('wallet_balance') + refund,
+            )
+        Transaction.objects.bulk_create(refund_transactions)
+
+        # Reject remaining PENDING applications
+        ShiftApplication.objects.filter(
+            shift_id__in=shift_ids, status='PENDING',
+        ).update(status='REJECTED', updated_at=now)
+
+    return shift_ids
+
+
+def complete_stuck_clock_outs(applications):
+    """
+    Auto-complete one chunk of IN_PROGRESS applications whose professional
+    forgot to clock out. Rows locked by another worker are skipped. Returns
+    the ids of the completed applications, in queryset order.
+    """
+    from .rating_service import record_professional_stats
+    from billing.models import DuePayout
+
+    with transaction.atomic():
+        apps = list(
+            applications.select_for_update(skip_locked=True, of=('self',))
+            .select_related('shift', 'professional__user')
         )
-        print(f"Notified {pro.user.email} (score={pro.professional_score})")
+        for app in apps:
+            app.clock_out_time = app.shift.end_time  # Clock out at scheduled end
+            app.status = 'COMPLETED'
+            app.save(update_fields=['status', 'clock_out_time', 'updated_at'])
+
+            # Queue payout (due immediately since shift already ended)
+            DuePayout.schedule(app, delay=timezone.timedelta(0))
+
+            record_professional_stats(app.professional, completed=1)
+
+            Notification.send(
+                user=app.professional.user,
+                title="Shift Auto-Completed",
+                message=(
+                    f"Your shift '{app.shift.role}' was automatically completed "
+                    f"because you did not clock out. Payment is being processed."
+                ),
+                notification_type="SHIFT_APPROVED",
+                related_object_id=app.id,
+            )
+
+    return [app.id for app in apps]
+
+
+def _drain_in_chunks(queryset, process_chunk):
+    """
+    Feed a queryset to process_chunk in id-ordered chunks, resuming after the
+    last processed id (keyset pagination) until nothing is left.
+    """
+    chunk_size = settings.MAINTENANCE_CHUNK_SIZE
+    queryset = queryset.order_by('id')
+    processed = 0
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        ids = process_chunk(chunk[:chunk_size])
+        if not ids:
+            return processed
+        processed += len(ids)
+        last_id = ids[-1]
+
+
+def _drain_maintenance_backlog():
+    now = timezone.now()
+
+    # --- 1. Expire OPEN/FILLED shifts past their end time ---
+    shift_count = _drain_in_chunks(
+        Shift.objects.filter(status__in=['OPEN', 'FILLED'], end_time__lte=now),
+        lambda chunk: expire_shifts(chunk, now),
+    )
+
+    # --- 2. Auto-complete forgotten clock-outs (2 h grace period) ---
+    grace = now - timezone.timedelta(hours=2)
+    auto_count = _drain_in_chunks(
+        ShiftApplication.objects.filter(
+            status='IN_PROGRESS',
+            shift__end_time__lte=grace,
+            clock_out_time__isnull=True,
+        ),
+        complete_stuck_clock_outs,
+    )
+
+    return shift_count, auto_count
 
 
 @shared_task
@@ -86,70 +265,61 @@ def close_expired_shifts():
        refund unfilled spots, reject remaining PENDING apps.
     2. IN_PROGRESS applications whose shift end_time has passed by 2+ hours
        and the professional forgot to clock out → auto-complete them.
+
+    A cache lock keeps beat runs from overlapping. Work is chunked with
+    skip-locked row locks, so MAINTENANCE_PARALLEL_WORKERS - 1 helper tasks
+    can drain the same backlog alongside this one.
     """
-    from decimal import Decimal
-    from .rating_service import refresh_professional_stats
-    from billing.tasks import payout_professional
+    with cache_lock(CLOSE_EXPIRED_SHIFTS_LOCK, timeout=CLOSE_EXPIRED_SHIFTS_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            return "close_expired_shifts is already running; skipped."
 
-    now = timezone.now()
+        for _ in range(settings.MAINTENANCE_PARALLEL_WORKERS - 1):
+            drain_expired_shifts_backlog.delay()
 
-    # --- 1. Expire OPEN/FILLED shifts past their end time ---
-    expired_shifts = Shift.objects.filter(
-        status__in=['OPEN', 'FILLED'],
-        end_time__lte=now,
-    )
+        shift_count, auto_count = _drain_maintenance_backlog()
 
-    shift_count = 0
-    for shift in expired_shifts:
-        shift.status = 'COMPLETED'
-        shift.save(update_fields=['status', 'updated_at'])
+    return f"Completed {shift_count} expired shifts, auto-completed {auto_count} applications."
 
-        # Refund for unfilled spots
-        unfilled = shift.quantity_needed - shift.quantity_filled
-        if unfilled > 0:
-            duration_hours = (shift.end_time - shift.start_time).total_seconds() / 3600
-            refund = shift.rate * Decimal(str(duration_hours)) * unfilled
-            facility = shift.facility
-            facility.wallet_balance += refund
-            facility.save(update_fields=['wallet_balance'])
 
-        # Reject remaining PENDING applications
-        ShiftApplication.objects.filter(
-            shift=shift, status='PENDING',
-        ).update(status='REJECTED')
+@shared_task
+def drain_expired_shifts_backlog():
+    """Helper worker for close_expired_shifts; safe to run concurrently."""
+    shift_count, auto_count = _drain_maintenance_backlog()
+    return f"Completed {shift_count} expired shifts, auto-completed {auto_count} applications."
 
-        shift_count += 1
 
-    # --- 2. Auto-complete forgotten clock-outs (2 h grace period) ---
-    grace = now - timezone.timedelta(hours=2)
-    stuck_apps = ShiftApplication.objects.filter(
-        status='IN_PROGRESS',
-        shift__end_time__lte=grace,
-        clock_out_time__isnull=True,
-    ).select_related('shift__facility__user', 'professional')
-
-    auto_count = 0
-    for app in stuck_apps:
-        app.clock_out_time = app.shift.end_time  # Clock out at scheduled end
-        app.status = 'COMPLETED'
-        app.save(update_fields=['status', 'clock_out_time', 'updated_at'])
-
-        # Trigger payout (immediate since shift already ended)
-        payout_professional.apply_async((app.id,), countdown=60)
-
-        refresh_professional_stats(app.professional)
-
-        Notification.send(
-            user=app.professional.user,
-            title="Shift Auto-Completed",
-            message=(
-                f"Your shift '{app.shift.role}' was automatically completed "
-                f"because you did not clock out. Payment is being processed."
-            ),
-            notification_type="SHIFT_APPROVED",
-            related_object_id=app.id,
-        )
-        auto_count += 1
+@shared_task
+def expire_due_shifts():
+    """
+    Runs every minute. Expires shifts whose expiry bucket is due, so shifts
+    close (and facilities are refunded) about a minute after end_time.
+    close_expired_shifts stays as the hourly safety net.
+    """
+    now = timezone.now()
+    due = ShiftExpiry.objects.filter(bucket__lte=now)
 
-    return f"Completed {shift_count} expired shifts, auto-completed {auto_count} applications."
+    shift_count = _drain_in_chunks(
+        Shift.objects.filter(
+            expiry__in=due, status__in=['OPEN', 'FILLED'], end_time__lte=now,
+        ),
+        lambda chunk: expire_shifts(chunk, now),
+    )
+
+    # Drop timers that are done with; ones whose shift another worker had
+    # locked are kept and retried on the next tick.
+    due.exclude(shift__status__in=['OPEN', 'FILLED']).delete()
+
+    return f"Expired {shift_count} due shifts."
+
+
+@shared_task
+def reconcile_professional_stats():
+    """
+    Runs daily. Recomputes rating and reliability counters from the source
+    rows and repairs any drift in the incrementally maintained values.
+    """
+    from .rating_service import reconcile_professional_stats as reconcile
 
+    fixed = reconcile(batch_size=settings.MAINTENANCE_CHUNK_SIZE)
+    return f"Reconciled stats for {fixed} professionals."
@@ -1,3 +1,489 @@
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Facility, Professional, Specialty, SpecialtyAlias, User
+from billing.models import Transaction
+from core.models import Notification
+from core.testing import QueryBudgetMixin
+from .feed_cache import OpenShiftFeed
+from .models import Shift, ShiftApplication
+from .cancellation_services import FacilityDeleteShiftService, ProfessionalCancelShiftService
+from .rating_service import RatingService, reconcile_professional_stats
+from .selectors import ShiftSelector
+from .services import ClockOutService, ShiftApplyService, ShiftCreateService, ShiftManageApplicationService
+from .tasks import expire_shifts
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Query plans are checked on PostgreSQL only')
+class HotQueryPlanTests(TestCase):
+    """
+    EXPLAIN the hot query shapes with sequential scans disabled. If the plan
+    still contains a Seq Scan, no index can serve the query.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        facility_user = User.objects.create_user(email='facility@example.com', password='x')
+        cls.facility = Facility.objects.create(
+            user=facility_user, name='Plan Test Hospital', address='Lagos', rc_number='RC-PLAN',
+            is_verified=True, wallet_balance=Decimal('1000000'),
+        )
+        cls.professionals = []
+        for i in range(20):
+            user = User.objects.create_user(email=f'pro{i}@example.com', password='x')
+            cls.professionals.append(
+                Professional.objects.create(user=user, license_number=f'LIC-PLAN-{i}', is_verified=True)
+            )
+
+        statuses = ['OPEN', 'FILLED', 'COMPLETED', 'CANCELLED']
+        for i in range(200):
+            start = now + timedelta(hours=i - 100)
+            shift = Shift.objects.create(
+                facility=cls.facility, role='Nurse', specialty='ICU', quantity_needed=2,
+                start_time=start, end_time=start + timedelta(hours=8),
+                rate=Decimal('3000'), status=statuses[i % len(statuses)],
+            )
+            pro = cls.professionals[i % len(cls.professionals)]
+            ShiftApplication.objects.create(
+                shift=shift, professional=pro, status=['PENDING', 'CONFIRMED', 'IN_PROGRESS'][i % 3],
+            )
+            Notification.objects.create(
+                user=pro.user, title='New Shift Available', message='-',
+                notification_type='SHIFT_POSTED', related_object_id=shift.id,
+            )
+            Transaction.objects.create(
+                user=facility_user, amount=Decimal('100'), transaction_type='CHARGE',
+                reference=f'plan-{i}', status='SUCCESS', shift=shift,
+            )
+        cls.shift = Shift.objects.filter(facility=cls.facility).first()
+
+    def assertNoSeqScan(self, queryset):
+        with connection.cursor() as cursor:
+            # Scoped to the test transaction
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertNotIn('Seq Scan', plan, msg=f"\n{queryset.query}\n{plan}")
+
+    def test_shift_selectors(self):
+        selector = ShiftSelector()
+        self.assertNoSeqScan(selector.list_facility_shifts(self.facility))
+        self.assertNoSeqScan(selector.list_facility_shifts(self.facility, status='open'))
+        self.assertNoSeqScan(selector.list_applications(self.shift.id, self.facility.user))
+        self.assertNoSeqScan(selector.list_facility_pending_applications(self.facility, exclude_clashing=True))
+        now = timezone.now()
+        self.assertNoSeqScan(selector.list_calendar_shifts(self.facility, now, now + timedelta(days=30)))
+        self.assertNoSeqScan(selector.clashing_applications(
+            [p.id for p in self.professionals], self.shift.start_time, self.shift.end_time,
+        ))
+
+    def test_open_shift_feed_queries(self):
+        # Cache fills in shifts.feed_cache.OpenShiftFeed
+        feed = OpenShiftFeed()
+        selector = ShiftSelector()
+        self.assertNoSeqScan(feed.open_shifts())
+        self.assertNoSeqScan(feed.open_shifts(names=['icu']))
+        self.assertNoSeqScan(selector.filter_specialty_names(Shift.objects.all(), ['icu']))
+        self.assertNoSeqScan(feed.open_shifts(region='6:3'))
+        # OpenShiftFeed.applied_shift_ids
+        self.assertNoSeqScan(
+            ShiftApplication.objects.filter(professional=self.professionals[0]).values_list('shift_id', flat=True)
+        )
+
+    def test_maintenance_task_queries(self):
+        now = timezone.now()
+        # shifts.tasks.close_expired_shifts
+        self.assertNoSeqScan(Shift.objects.filter(status__in=['OPEN', 'FILLED'], end_time__lte=now))
+        self.assertNoSeqScan(ShiftApplication.objects.filter(
+            status='IN_PROGRESS', shift__end_time__lte=now, clock_out_time__isnull=True,
+        ))
+        # shifts.tasks.notify_matching_professionals
+        self.assertNoSeqScan(ShiftApplication.objects.filter(shift=self.shift, status='PENDING'))
+        self.assertNoSeqScan(Notification.objects.filter(
+            user=self.professionals[0].user, notification_type='SHIFT_POSTED',
+            related_object_id=self.shift.id,
+        ))
+
+    def test_list_views(self):
+        # core.views.NotificationListView
+        self.assertNoSeqScan(
+            Notification.objects.filter(user=self.professionals[0].user).order_by('-created_at')
+        )
+        # billing.views.TransactionListView
+        self.assertNoSeqScan(
+            Transaction.objects.filter(user=self.facility.user).order_by('-created_at')
+        )
+
+
+class ListQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Shift list endpoints run the same number of queries however many rows they return."""
+
+    @classmethod
+    def setUpTestData(cls):
+        facility_user = User.objects.create_user(email='budget-facility@example.com', password='x')
+        cls.facility = Facility.objects.create(
+            user=facility_user, name='Budget Hospital', address='Lagos', rc_number='RC-BUDGET',
+            is_verified=True, wallet_balance=Decimal('1000000'),
+        )
+        pro_user = User.objects.create_user(email='budget-pro@example.com', password='x')
+        cls.professional = Professional.objects.create(
+            user=pro_user, license_number='LIC-BUDGET', is_verified=True,
+            current_location_lat=6.45, current_location_lng=3.39,
+        )
+
+    def setUp(self):
+        self.seeded = 0
+
+    def seed_shifts(self, n, facility=None):
+        shifts = []
+        for _ in range(n):
+            self.seeded += 1
+            # A separate facility per shift so facility lookups cannot be shared
+            if facility is None:
+                user = User.objects.create_user(email=f'budget-f{self.seeded}@example.com', password='x')
+                owner = Facility.objects.create(
+                    user=user, name=f'Hospital {self.seeded}', address='Lagos', rc_number=f'RC-B{self.seeded}',
+                )
+            else:
+                owner = facility
+            start = timezone.now() + timedelta(days=1, hours=10 * self.seeded)
+            shifts.append(Shift.objects.create(
+                facility=owner, role='Nurse', specialty='ICU', quantity_needed=2,
+                start_time=start, end_time=start + timedelta(hours=8), rate=Decimal('3000'),
+                latitude=6.5, longitude=3.4,
+            ))
+        return shifts
+
+    def seed_applications(self, n, status='PENDING', shift=None):
+        for s in ([shift] * n if shift else self.seed_shifts(n)):
+            self.seeded += 1
+            user = User.objects.create_user(email=f'budget-p{self.seeded}@example.com', password='x')
+            pro = Professional.objects.create(user=user, license_number=f'LIC-B{self.seeded}')
+            ShiftApplication.objects.create(shift=s, professional=pro, status=status)
+
+    def test_open_shift_feed(self):
+        client = self.api_client(self.professional.user)
+        self.assertConstantQueries(client, '/api/v1/shifts/', self.seed_shifts)
+
+    def test_professional_shift_list(self):
+        client = self.api_client(self.professional.user)
+        self.assertConstantQueries(client, '/api/v1/shifts/professional/', self.seed_shifts)
+
+    def test_facility_shift_list(self):
+        client = self.api_client(self.facility.user)
+        self.assertConstantQueries(
+            client, '/api/v1/shifts/facility/', lambda n: self.seed_shifts(n, facility=self.facility),
+        )
+
+    def test_my_applications(self):
+        def seed(n):
+            for s in self.seed_shifts(n):
+                ShiftApplication.objects.create(shift=s, professional=self.professional)
+
+        client = self.api_client(self.professional.user)
+        self.assertConstantQueries(client, '/api/v1/shifts/my-applications/', seed)
+
+    def test_shift_applicants(self):
+        shift = self.seed_shifts(1, facility=self.facility)[0]
+        client = self.api_client(self.facility.user)
+        self.assertConstantQueries(
+            client, f'/api/v1/shifts/{shift.id}/applicants/',
+            lambda n: self.seed_applications(n, shift=shift),
+        )
+
+    def test_calendar(self):
+        def seed(n):
+            for s in self.seed_shifts(n, facility=self.facility):
+                self.seed_applications(2, status='CONFIRMED', shift=s)
+
+        today = timezone.now().date()
+        url = f'/api/v1/shifts/calendar/?date_start={today}&date_end={today + timedelta(days=30)}'
+        client = self.api_client(self.facility.user)
+        # Facility, shifts in range, booked applications with their users
+        self.assertConstantQueries(client, url, seed, budget=3)
+
+    def test_facility_pending_applications(self):
+        def seed(n):
+            for i, s in enumerate(self.seed_shifts(n, facility=self.facility)):
+                self.seed_applications(1, shift=s)
+                if i % 2:
+                    # Applicant already booked elsewhere at the same time: filtered out
+                    app = ShiftApplication.objects.filter(shift=s).latest('created_at')
+                    other = self.seed_shifts(1)[0]
+                    Shift.objects.filter(id=other.id).update(start_time=s.start_time, end_time=s.end_time)
+                    ShiftApplication.objects.create(
+                        shift=Shift.objects.get(id=other.id), professional=app.professional, status='CONFIRMED',
+                    )
+
+        client = self.api_client(self.facility.user)
+        url = '/api/v1/facility/applications/pending/?page_size=100'
+        self.assertConstantQueries(client, url, seed)
+        data = client.get(url).json()['data']
+        self.assertEqual(len(data), 4)
+
+
+class OpenShiftFeedTests(QueryBudgetMixin, TestCase):
+    """The cached feeds follow shift writes, and each professional's exclusions stay their own."""
+
+    def setUp(self):
+        cache.clear()
+        facility_user = User.objects.create_user(email='feed-facility@example.com', password='x')
+        self.facility = Facility.objects.create(
+            user=facility_user, name='Feed Hospital', address='Lagos', rc_number='RC-FEED',
+            is_verified=True, wallet_balance=Decimal('1000000'),
+        )
+        self.professionals = []
+        for i in range(2):
+            user = User.objects.create_user(email=f'feed-pro{i}@example.com', password='x')
+            self.professionals.append(Professional.objects.create(
+                user=user, license_number=f'LIC-FEED-{i}', is_verified=True,
+                current_location_lat=6.45, current_location_lng=3.39,
+            ))
+
+    def create_shift(self, latitude=6.5, longitude=3.4, quantity_needed=2):
+        start = timezone.now() + timedelta(days=1)
+        with mock.patch('shifts.services.notify_matching_professionals.delay'), \
+                self.captureOnCommitCallbacks(execute=True):
+            return ShiftCreateService()(
+                user=self.facility.user, role='Nurse', specialty='ICU', quantity_needed=quantity_needed,
+                start_time=start, end_time=start + timedelta(hours=8), rate=Decimal('3000'),
+                address='Marina', latitude=latitude, longitude=longitude,
+            )
+
+    def feed(self, professional, url):
+        response = self.api_client(professional.user).get(url)
+        self.assertEqual(response.status_code, 200)
+        return {row['id']: row for row in response.json()['data']}
+
+    def feeds(self, professional):
+        return (
+            self.feed(professional, '/api/v1/shifts/'),
+            self.feed(professional, '/api/v1/shifts/professional/?radius_km=50'),
+        )
+
+    def test_created_shift_appears(self):
+        pro = self.professionals[0]
+        self.assertEqual(self.feeds(pro), ({}, {}))
+        shift = self.create_shift()
+        for rows in self.feeds(pro):
+            self.assertIn(str(shift.id), rows)
+
+    def test_application_excludes_shift_for_that_professional_only(self):
+        shift = self.create_shift()
+        applicant, other = self.professionals
+        self.feeds(applicant)  # warm the shared entries
+        with self.captureOnCommitCallbacks(execute=True):
+            ShiftApplyService()(user=applicant.user, shift_id=shift.id)
+        for rows in self.feeds(applicant):
+            self.assertNotIn(str(shift.id), rows)
+        for rows in self.feeds(other):
+            self.assertIn(str(shift.id), rows)
+
+    def test_confirmation_updates_fill_count(self):
+        shift = self.create_shift(quantity_needed=1)
+        applicant, viewer = self.professionals
+        application = ShiftApplyService()(user=applicant.user, shift_id=shift.id)
+        self.feeds(viewer)
+        with mock.patch('shifts.services.notify_matching_professionals.delay'), \
+                self.captureOnCommitCallbacks(execute=True):
+            ShiftManageApplicationService()(user=self.facility.user, application_id=application.id, action='CONFIRM')
+        for rows in self.feeds(viewer):
+            self.assertEqual(rows[str(shift.id)]['status'], 'FILLED')
+            self.assertEqual(rows[str(shift.id)]['quantity_filled'], 1)
+
+    def test_deleted_shift_disappears(self):
+        shift = self.create_shift()
+        pro = self.professionals[0]
+        self.feeds(pro)
+        with self.captureOnCommitCallbacks(execute=True):
+            FacilityDeleteShiftService()(user=self.facility.user, shift_id=shift.id)
+        self.assertEqual(self.feeds(pro), ({}, {}))
+
+    def test_expired_shift_disappears(self):
+        shift = self.create_shift()
+        pro = self.professionals[0]
+        self.feeds(pro)
+        with self.captureOnCommitCallbacks(execute=True):
+            expire_shifts(Shift.objects.filter(id=shift.id), timezone.now())
+        self.assertEqual(self.feeds(pro), ({}, {}))
+
+    def test_facility_rename_is_not_stale(self):
+        shift = self.create_shift()
+        pro = self.professionals[0]
+        self.feeds(pro)
+        Facility.objects.filter(id=self.facility.id).update(name='Renamed Hospital')
+        for rows in self.feeds(pro):
+            self.assertEqual(rows[str(shift.id)]['facility'], 'Renamed Hospital')
+
+    def test_specialty_edits_change_the_filtered_etag(self):
+        shift = self.create_shift()
+        specialty = Specialty.objects.create(name='ICU')
+        client = self.api_client(self.professionals[0].user)
+        url = '/api/v1/shifts/?specialty=Intensive Care'
+        first = client.get(url)
+        self.assertNotIn(str(shift.id), {row['id'] for row in first.json()['data']})
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        SpecialtyAlias.objects.create(specialty=specialty, name='Intensive Care')
+        second = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn(str(shift.id), {row['id'] for row in second.json()['data']})
+
+    def test_write_elsewhere_keeps_regional_entries(self):
+        self.create_shift()
+        pro = self.professionals[0]
+        url = '/api/v1/shifts/professional/?radius_km=50'
+        self.feed(pro, url)
+        # Abuja is several region cells away from Lagos
+        self.create_shift(latitude=9.06, longitude=7.49)
+        with mock.patch.object(OpenShiftFeed, '_load', autospec=True, side_effect=OpenShiftFeed._load) as load:
+            self.feed(pro, url)
+        load.assert_not_called()
+
+
+class ExpireShiftsTests(TestCase):
+    """Set-based expiry refunds exactly what the old per-shift loop did."""
+
+    def setUp(self):
+        self.facilities = []
+        for i in range(2):
+            user = User.objects.create_user(email=f'expire-f{i}@example.com', password='x')
+            self.facilities.append(Facility.objects.create(
+                user=user, name=f'Expire Hospital {i}', address='Lagos', rc_number=f'RC-EXP-{i}',
+                is_verified=True, wallet_balance=Decimal('1000.00'),
+            ))
+        pro_user = User.objects.create_user(email='expire-pro@example.com', password='x')
+        self.professional = Professional.objects.create(user=pro_user, license_number='LIC-EXP')
+
+    def shift(self, facility, hours, rate, needed, filled=0):
+        end = timezone.now() - timedelta(minutes=5)
+        return Shift.objects.create(
+            facility=facility, role='Nurse', specialty='ICU', start_time=end - timedelta(hours=hours),
+            end_time=end, rate=Decimal(rate), quantity_needed=needed, quantity_filled=filled,
+            status='FILLED' if filled >= needed else 'OPEN',
+        )
+
+    def test_refunds_per_facility(self):
+        first, second = self.facilities
+        shifts = [
+            self.shift(first, hours=8, rate='3000', needed=2),            # 48000 back
+            self.shift(first, hours=4, rate='2500', needed=3, filled=1),  # 20000 back
+            self.shift(first, hours=6, rate='2000', needed=1, filled=1),  # filled: nothing back
+            self.shift(second, hours=12, rate='4000', needed=1),          # 48000 back
+        ]
+        pending = ShiftApplication.objects.create(shift=shifts[0], professional=self.professional)
+        later = self.shift(second, hours=2, rate='2000', needed=1)
+        Shift.objects.filter(id=later.id).update(end_time=timezone.now() + timedelta(hours=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            expired = expire_shifts(Shift.objects.filter(end_time__lte=timezone.now()), timezone.now())
+
+        self.assertCountEqual(expired, [s.id for s in shifts])
+        for facility, balance in ((first, '69000.00'), (second, '49000.00')):
+            facility.refresh_from_db()
+            self.assertEqual(facility.wallet_balance, Decimal(balance))
+        refunds = Transaction.objects.filter(transaction_type='REFUND')
+        self.assertEqual(
+            sorted((t.shift_id, t.amount, t.user_id) for t in refunds),
+            sorted([
+                (shifts[0].id, Decimal('48000.00'), first.user_id),
+                (shifts[1].id, Decimal('20000.00'), first.user_id),
+                (shifts[3].id, Decimal('48000.00'), second.user_id),
+            ]),
+        )
+        self.assertEqual(Shift.objects.filter(status='COMPLETED').count(), 4)
+        self.assertEqual(Shift.objects.get(id=later.id).status, 'OPEN')
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'REJECTED')
+
+
+class ProfessionalStatsTests(TestCase):
+    """Incremental stat counters, the derived score, and the reconciliation that repairs them."""
+
+    def setUp(self):
+        user = User.objects.create_user(email='stats-facility@example.com', password='x')
+        self.facility = Facility.objects.create(
+            user=user, name='Stats Hospital', address='Lagos', rc_number='RC-STATS', is_verified=True,
+        )
+        pro_user = User.objects.create_user(email='stats-pro@example.com', password='x')
+        self.professional = Professional.objects.create(user=pro_user, license_number='LIC-STATS')
+        self.hours = 0
+
+    def application(self, status, start):
+        self.hours += 10
+        shift = Shift.objects.create(
+            facility=self.facility, role='Nurse', specialty='ICU', quantity_needed=1, quantity_filled=1,
+            start_time=start, end_time=start + timedelta(hours=8), rate=Decimal('3000'), status='FILLED',
+        )
+        return ShiftApplication.objects.create(
+            shift=shift, professional=self.professional, status=status,
+            clock_in_time=start if status == 'IN_PROGRESS' else None, check_out_code='654321',
+        )
+
+    def complete_and_rate(self, rating):
+        app = self.application('IN_PROGRESS', timezone.now() - timedelta(days=10, hours=self.hours))
+        with self.captureOnCommitCallbacks():
+            ClockOutService()(user=self.professional.user, shift_id=app.shift_id, code='654321')
+            RatingService().submit_review(user=self.facility.user, application_id=app.id, rating=rating)
+
+    def cancel_short_notice(self):
+        # 2-4 hours before the start: cancelled, with an automatic 2-star review
+        app = self.application('CONFIRMED', timezone.now() + timedelta(hours=3))
+        with self.captureOnCommitCallbacks():
+            ProfessionalCancelShiftService()(user=self.professional.user, shift_id=app.shift_id, reason='Sick')
+
+    def assertStats(self, avg_rating, ratings, completed, cancelled, score):
+        pro = Professional.objects.get(id=self.professional.id)
+        self.assertEqual(pro.avg_rating, Decimal(avg_rating))
+        self.assertEqual(pro.total_ratings, ratings)
+        self.assertEqual(pro.total_completed_shifts, completed)
+        self.assertEqual(pro.total_cancelled_shifts, cancelled)
+        self.assertAlmostEqual(pro.professional_score, score, delta=0.006)
+
+    def test_complete_cancel_and_rate(self):
+        self.complete_and_rate(5)
+        self.complete_and_rate(4)
+        # Under three ratings the score stays at the 4.0 baseline
+        self.assertStats('4.50', ratings=2, completed=2, cancelled=0, score=4.0)
+
+        self.complete_and_rate(3)
+        # 4.0 x 0.5 + 1.0 x 5 x 0.35 + (17/20) x 5 x 0.15
+        self.assertStats('4.00', ratings=3, completed=3, cancelled=0, score=4.3875)
+
+        self.cancel_short_notice()
+        # (5+4+3+2)/4 = 3.5; 3.5 x 0.5 + 0.75 x 5 x 0.35 + (16/20) x 5 x 0.15
+        self.assertStats('3.50', ratings=4, completed=3, cancelled=1, score=3.6625)
+
+    def test_reconcile_repairs_corrupted_counters(self):
+        for rating in (5, 4, 3):
+            self.complete_and_rate(rating)
+        self.cancel_short_notice()
+        Professional.objects.filter(id=self.professional.id).update(
+            total_completed_shifts=10, rating_sum=0, avg_rating=Decimal('0.00'), professional_score=0,
+        )
+
+        self.assertEqual(reconcile_professional_stats(), 1)
+        self.assertStats('3.50', ratings=4, completed=3, cancelled=1, score=3.6625)
+        self.assertEqual(reconcile_professional_stats(), 0)
+
+
+class SpecialtyFilterTests(TestCase):
 
-# Create your tests here.
+    def test_matches_shift_specialties_however_they_are_spaced(self):
+        user = User.objects.create_user(email='spacing-facility@example.com', password='x')
+        facility = Facility.objects.create(user=user, name='Spacing Hospital', address='Lagos', rc_number='RC-SPACE')
+        start = timezone.now() + timedelta(days=1)
+        for specialty in ('ICU Nurse', 'ICU  Nurse', ' icu nurse ', 'ICU\tNURSE', 'ICU Nurses'):
+            Shift.objects.create(
+                facility=facility, role='Nurse', specialty=specialty, start_time=start,
+                end_time=start + timedelta(hours=8), rate=Decimal('3000'),
+            )
+        matched = ShiftSelector().filter_specialty_names(Shift.objects.all(), ['icu nurse'])
+        self.assertEqual(matched.count(), 4)
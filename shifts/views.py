@@ -1,18 +1,57 @@
+import uuid
+from datetime import datetime, time, timedelta
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from core.conditional import etag
+from core.exports import StreamingExport
+from core.pagination import CURSOR_PARAMETERS, CursorPaginator, RankedPaginator
 from core.router import route
+from accounts.selectors import SpecialtySelector
 from .services import ShiftCreateService, ShiftUpdateService, ShiftApplyService, ShiftManageApplicationService, ClockInService, ClockOutService, ExtraTimeService
 from .cancellation_services import FacilityCancelShiftService, ProfessionalCancelShiftService, FacilityDeleteShiftService, FacilityEndShiftEarlyService
 from .approval_services import ApproveShiftStartService
 from .selectors import ShiftSelector
+from .feed_cache import OpenShiftFeed
 from .models import ShiftApplication
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes, inline_serializer
 from rest_framework import serializers
 
+
+def _newest_first(shift):
+    # RankedPaginator rank for feeds ordered by created_at descending
+    return -shift.created_at.timestamp()
+
+
+def _open_feed_version(request):
+    # Any open-shift change, plus the viewer's own applications and location
+    version = [OpenShiftFeed().version()]
+    if request.query_params.get('specialty'):
+        # Specialty and alias edits change which shifts the filter matches
+        version.append(SpecialtySelector().version())
+    if request.user.is_professional:
+        professional = request.user.professional
+        version += [
+            ShiftSelector().applications_version(professional),
+            professional.current_location_lat, professional.current_location_lng,
+        ]
+    return version
+
+
+def _my_applications_version(request):
+    if not request.user.is_professional:
+        return None
+    return ShiftSelector().applications_version(request.user.professional)
+
+
 @extend_schema(
     parameters=[
         OpenApiParameter(name='specialty', description='Filter by specialty', required=False, type=str),
+        *CURSOR_PARAMETERS,
     ],
     responses={
         200: inline_serializer(
@@ -34,14 +73,25 @@ from rest_framework import serializers
 class ShiftListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag(_open_feed_version)
     def get(self, request):
         selector = ShiftSelector()
+        feed = OpenShiftFeed()
         specialty = request.query_params.get("specialty")
+        shifts = feed.shifts(specialty=specialty)
         # If the user is a professional, exclude shifts they already applied to
         exclude_pro = None
         if request.user.is_professional:
             exclude_pro = request.user.professional
-        shifts = selector.list_open_shifts(specialty=specialty, exclude_professional=exclude_pro)
+            applied = feed.applied_shift_ids(exclude_pro)
+            shifts = [s for s in shifts if s.id not in applied]
+        paginator = RankedPaginator(request)
+        shifts = feed.with_facilities(paginator.paginate(shifts, rank=_newest_first))
+        distances = {}
+        if exclude_pro:
+            distances = selector.shift_distances(
+                shifts, exclude_pro.current_location_lat, exclude_pro.current_location_lng,
+            )
 
         data = [{
             "id": str(s.id),
@@ -60,10 +110,11 @@ class ShiftListCreateView(APIView):
             "address": s.address,
             "latitude": s.latitude,
             "longitude": s.longitude,
+            "distance": distances.get(s.id),
             "created_at": s.created_at,
         } for s in shifts]
         
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
     @extend_schema(
         request=inline_serializer(
@@ -286,6 +337,9 @@ class ShiftDetailView(APIView):
             return Response({"error": "Shift not found"}, status=404)
 
 @extend_schema(
+    parameters=[
+        OpenApiParameter(name='sort', description="'score' to rank by professional score (default: newest first)", required=False, type=str),
+    ],
     responses={
         200: inline_serializer(
             name='ShiftApplicantsResponse',
@@ -317,7 +371,9 @@ class ShiftApplicantsView(APIView):
     def get(self, request, shift_id):
         try:
             selector = ShiftSelector()
-            applications = selector.list_applications(shift_id, request.user)
+            applications = selector.list_applications(
+                shift_id, request.user, sort=request.query_params.get('sort'),
+            )
 
             data = []
             for app in applications:
@@ -334,6 +390,7 @@ class ShiftApplicantsView(APIView):
                     "professional_avg_rating": float(app.professional.avg_rating),
                     "professional_total_ratings": app.professional.total_ratings,
                     "professional_completed_shifts": app.professional.total_completed_shifts,
+                    "professional_score": app.professional.professional_score,
                     "status": app.status,
                     "applied_at": app.created_at,
                     "clock_in_time": app.clock_in_time,
@@ -602,6 +659,11 @@ class ShiftEndEarlyView(APIView):
 
 
 @extend_schema(
+    parameters=[
+        OpenApiParameter(name='status', description='Filter by shift status', required=False, type=str),
+        OpenApiParameter(name='specialty', description='Filter by specialty (matches aliases and related names)', required=False, type=str),
+        *CURSOR_PARAMETERS,
+    ],
     responses={
         200: inline_serializer(
             name='FacilityShiftListResponse',
@@ -629,8 +691,12 @@ class FacilityShiftListView(APIView):
             return Response({"error": "Only facilities can view this."}, status=403)
 
         status_filter = request.query_params.get('status')
+        specialty = request.query_params.get('specialty')
         selector = ShiftSelector()
-        shifts = selector.list_facility_shifts(request.user.facility, status=status_filter)
+        paginator = CursorPaginator(request)
+        shifts = paginator.paginate(
+            selector.list_facility_shifts(request.user.facility, status=status_filter, specialty=specialty)
+        )
         
         data = [{
             "id": shift.id,
@@ -644,7 +710,92 @@ class FacilityShiftListView(APIView):
             "rate": shift.rate
         } for shift in shifts]
         
-        return Response(data)
+        return paginator.get_paginated_response(data)
+
+
+SHIFT_EXPORT = StreamingExport([
+    ('id', lambda s: str(s.id)),
+    ('created_at', lambda s: s.created_at),
+    ('role', lambda s: s.role),
+    ('specialty', lambda s: s.specialty),
+    ('start_time', lambda s: s.start_time),
+    ('end_time', lambda s: s.end_time),
+    ('status', lambda s: s.status),
+    ('quantity_needed', lambda s: s.quantity_needed),
+    ('quantity_filled', lambda s: s.quantity_filled),
+    ('rate', lambda s: s.rate),
+    ('address', lambda s: s.address),
+])
+
+APPLICATION_EXPORT = StreamingExport([
+    ('id', lambda a: str(a.id)),
+    ('created_at', lambda a: a.created_at),
+    ('status', lambda a: a.status),
+    ('shift_id', lambda a: str(a.shift_id)),
+    ('shift_role', lambda a: a.shift.role),
+    ('shift_specialty', lambda a: a.shift.specialty),
+    ('shift_start_time', lambda a: a.shift.start_time),
+    ('shift_end_time', lambda a: a.shift.end_time),
+    ('shift_rate', lambda a: a.shift.rate),
+    ('facility_name', lambda a: a.shift.facility.name),
+    ('professional_id', lambda a: str(a.professional_id)),
+    ('professional_email', lambda a: a.professional.user.email),
+    ('clock_in_time', lambda a: a.clock_in_time),
+    ('clock_out_time', lambda a: a.clock_out_time),
+    ('cancelled_by', lambda a: a.cancelled_by or None),
+    ('cancellation_reason', lambda a: a.cancellation_reason or None),
+])
+
+
+@extend_schema(
+    parameters=[OpenApiParameter(name='status', description='Filter by status', required=False, type=str)],
+    responses={(200, 'text/csv'): OpenApiTypes.BINARY, (200, 'application/x-ndjson'): OpenApiTypes.BINARY},
+    description="The facility's full shift history, newest first, streamed as CSV (export.csv) or JSON lines (export.jsonl).",
+)
+@route("shifts/facility/export.<str:fmt>", name="facility-shift-export")
+class FacilityShiftExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, fmt):
+        if not request.user.is_facility:
+            return Response({"error": "Only facilities can view this."}, status=403)
+
+        shifts = ShiftSelector().list_facility_shifts(
+            request.user.facility, status=request.query_params.get('status'),
+        ).order_by('-created_at', '-id')
+        try:
+            return SHIFT_EXPORT.response(shifts, fmt, 'shifts')
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+
+@extend_schema(
+    responses={(200, 'text/csv'): OpenApiTypes.BINARY, (200, 'application/x-ndjson'): OpenApiTypes.BINARY},
+    description=(
+        "Application history, newest first, streamed as CSV (export.csv) or JSON lines (export.jsonl). "
+        "Professionals get their own applications; facilities get applications to their shifts."
+    ),
+)
+@route("shifts/applications/export.<str:fmt>", name="application-export")
+class ApplicationExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, fmt):
+        if request.user.is_professional:
+            applications = ShiftApplication.objects.filter(professional=request.user.professional)
+        elif request.user.is_facility:
+            applications = ShiftApplication.objects.filter(shift__facility=request.user.facility)
+        else:
+            return Response({"error": "Only professionals and facilities can export applications."}, status=403)
+
+        applications = (
+            applications.select_related('shift__facility', 'professional__user')
+            .order_by('-created_at', '-id')
+        )
+        try:
+            return APPLICATION_EXPORT.response(applications, fmt, 'applications')
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
 
 @extend_schema(
     responses={
@@ -709,7 +860,8 @@ class FacilityDashboardStatsView(APIView):
         ),
         403: inline_serializer(name='PendingAppsPermissionError', fields={'error': serializers.CharField()})
     },
-    description='List all pending applications across all facility shifts.',
+    parameters=CURSOR_PARAMETERS,
+    description='List pending applications across all facility shifts, leaving out applicants already booked at that time.',
 )
 @route("facility/applications/pending/", name="facility-pending-applications")
 class FacilityPendingApplicationsView(APIView):
@@ -719,21 +871,14 @@ class FacilityPendingApplicationsView(APIView):
         if not request.user.is_facility:
             return Response({"error": "Only facilities can view pending applications"}, status=403)
 
-        selector = ShiftSelector()
-        applications = selector.list_facility_pending_applications(request.user.facility)
+        # Professionals already booked at that time are filtered out in SQL
+        paginator = CursorPaginator(request)
+        applications = paginator.paginate(
+            ShiftSelector().list_facility_pending_applications(request.user.facility, exclude_clashing=True)
+        )
 
         data = []
         for app in applications:
-            # Skip professionals who already have a confirmed shift clashing with this one
-            has_clash = ShiftApplication.objects.filter(
-                professional=app.professional,
-                status__in=['CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING'],
-                shift__start_time__lt=app.shift.end_time,
-                shift__end_time__gt=app.shift.start_time
-            ).exists()
-            if has_clash:
-                continue
-
             data.append({
                 "id": str(app.id),
                 "professional_name": f"{app.professional.user.first_name} {app.professional.user.last_name}".strip() or app.professional.user.email,
@@ -751,9 +896,16 @@ class FacilityPendingApplicationsView(APIView):
                 "applied_at": app.created_at,
             })
 
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
 @extend_schema(
+    parameters=[
+        OpenApiParameter(name='sort', description='"created" (newest first, default) or "distance" (nearest first)', required=False, type=str),
+        OpenApiParameter(name='radius_km', description='Only shifts within this distance. Defaults to NEARBY_SHIFTS_DEFAULT_RADIUS_KM when sort=distance', required=False, type=float),
+        OpenApiParameter(name='lat', description='Search origin latitude (defaults to your current location)', required=False, type=float),
+        OpenApiParameter(name='lng', description='Search origin longitude (defaults to your current location)', required=False, type=float),
+        *CURSOR_PARAMETERS,
+    ],
     responses={
         200: inline_serializer(
             name='ProfessionalShiftListResponse',
@@ -765,9 +917,10 @@ class FacilityPendingApplicationsView(APIView):
                 'start_time': serializers.DateTimeField(),
                 'end_time': serializers.DateTimeField(),
                 'rate': serializers.DecimalField(max_digits=10, decimal_places=2),
-                'distance': serializers.CharField()
+                'distance': serializers.FloatField(allow_null=True, help_text='Distance in km from your current location')
             }
         ),
+        400: inline_serializer(name='ProfShiftListValidationError', fields={'error': serializers.CharField()}),
         403: inline_serializer(name='ProfShiftListPermissionError', fields={'error': serializers.CharField()})
     }
 )
@@ -775,12 +928,34 @@ class FacilityPendingApplicationsView(APIView):
 class ProfessionalShiftListView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @etag(_open_feed_version)
     def get(self, request):
         if not request.user.is_professional:
             return Response({"error": "Only professionals can view this."}, status=403)
 
-        selector = ShiftSelector()
-        shifts = selector.list_professional_shifts(request.user.professional)
+        professional = request.user.professional
+        try:
+            sort, lat, lng, radius_km = self._feed_params(request, professional)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        # Shared open-shift set from the cache, minus the professional's applications
+        feed = OpenShiftFeed()
+        if radius_km is None:
+            shifts, distances = feed.shifts(), None
+        else:
+            shifts, distances = feed.shifts_near(lat, lng, radius_km)
+        applied = feed.applied_shift_ids(professional)
+        shifts = [s for s in shifts if s.id not in applied]
+
+        paginator = RankedPaginator(request)
+        if sort == 'distance':
+            shifts = paginator.paginate(shifts, rank=lambda s: distances[s.id])
+        else:
+            shifts = paginator.paginate(shifts, rank=_newest_first)
+        feed.with_facilities(shifts)
+        if distances is None:
+            distances = ShiftSelector().shift_distances(shifts, lat, lng)
 
         data = [{
             "id": str(shift.id),
@@ -799,29 +974,59 @@ class ProfessionalShiftListView(APIView):
             "address": shift.address,
             "latitude": shift.latitude,
             "longitude": shift.longitude,
+            "distance": distances.get(shift.id),
             "created_at": shift.created_at,
         } for shift in shifts]
 
-        return Response(data)
-
+        return paginator.get_paginated_response(data)
 
+    @staticmethod
+    def _feed_params(request, professional):
+        params = request.query_params
+        sort = params.get('sort', 'created')
+        if sort not in ('created', 'distance'):
+            raise ValueError("sort must be 'created' or 'distance'.")
+        try:
+            lat = float(params['lat']) if params.get('lat') else professional.current_location_lat
+            lng = float(params['lng']) if params.get('lng') else professional.current_location_lng
+            radius_km = float(params['radius_km']) if params.get('radius_km') else None
+        except ValueError:
+            raise ValueError("lat, lng and radius_km must be numbers.")
+
+        if radius_km is None and sort == 'distance':
+            radius_km = settings.NEARBY_SHIFTS_DEFAULT_RADIUS_KM
+        if radius_km is not None:
+            if lat is None or lng is None:
+                raise ValueError("A location is required: pass lat and lng or update your current location.")
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                raise ValueError("lat/lng out of range.")
+            if not 0 < radius_km <= settings.NEARBY_SHIFTS_MAX_RADIUS_KM:
+                raise ValueError(f"radius_km must be between 0 and {settings.NEARBY_SHIFTS_MAX_RADIUS_KM}.")
+        return sort, lat, lng, radius_km
+
+
+@extend_schema(parameters=CURSOR_PARAMETERS)
 @route("shifts/my-applications/", name="professional-my-applications")
 class ProfessionalMyApplicationsView(APIView):
     """Returns the professional's shift applications with nested shift data."""
     permission_classes = [IsAuthenticated]
 
+    @etag(_my_applications_version)
     def get(self, request):
         if not request.user.is_professional:
             return Response({"error": "Only professionals can view this."}, status=403)
 
-        applications = ShiftApplication.objects.filter(
-            professional=request.user.professional
-        ).select_related('shift', 'shift__facility').order_by('-created_at')
+        paginator = CursorPaginator(request)
+        applications = paginator.paginate(
+            ShiftApplication.objects.filter(
+                professional=request.user.professional
+            ).select_related('shift', 'shift__facility')
+        )
 
         data = [{
             "id": str(app.id),
             "shift_id": str(app.shift.id),
-            "professional_id": str(app.professional.id),
+            "professional_id": str(app.professional_id),
             "status": app.status,
             "clock_in_time": app.clock_in_time.isoformat() if app.clock_in_time else None,
             "clock_out_time": app.clock_out_time.isoformat() if app.clock_out_time else None,
@@ -849,7 +1054,7 @@ class ProfessionalMyApplicationsView(APIView):
             }
         } for app in applications]
 
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
 
 @extend_schema(
@@ -990,19 +1195,28 @@ class CalendarViewSet(APIView):
         
         if not date_start or not date_end:
             return Response({"error": "date_start and date_end are required"}, status=400)
-            
+
+        try:
+            start, end = self._date_range(date_start, date_end)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        if applicant_id:
+            try:
+                applicant_id = uuid.UUID(applicant_id)
+            except ValueError:
+                return Response({"error": "applicant_id must be a UUID"}, status=400)
+
         selector = ShiftSelector()
-        shifts = selector.list_calendar_shifts(facility, date_start, date_end, applicant_id)
+        shifts = selector.list_calendar_shifts(facility, start, end, applicant_id)
         
         data = []
         for shift in shifts:
-            # Get confirmed professionals for this shift
-            apps = shift.applications.filter(status__in=['CONFIRMED', 'IN_PROGRESS', 'ATTENDANCE_PENDING', 'COMPLETED'])
+            # Confirmed professionals, prefetched by the selector
             professionals = [{
                 "id": app.professional.id,
                 "name": app.professional.user.email, # Or full name if available
                 "status": app.status
-            } for app in apps]
+            } for app in shift.booked_applications]
             
             data.append({
                 "id": shift.id,
@@ -1015,6 +1229,22 @@ class CalendarViewSet(APIView):
 
         return Response(data)
 
+    @staticmethod
+    def _date_range(date_start, date_end):
+        """
+        Whole days date_start..date_end (inclusive, YYYY-MM-DD) as the
+        half-open aware range [start of date_start, start of the day after
+        date_end) in the current timezone.
+        """
+        first, last = parse_date(date_start), parse_date(date_end)
+        if first is None or last is None:
+            raise ValueError("date_start and date_end must be dates (YYYY-MM-DD)")
+        if last < first:
+            raise ValueError("date_end must not be before date_start")
+        start = timezone.make_aware(datetime.combine(first, time.min))
+        end = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min))
+        return start, end
+
 
 # ============================================================
 # RATING & REVIEW ENDPOINTS